@@ -0,0 +1,146 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .utils import normalize_query
+
+class AnswerCache:
+    """
+    In-process cache of generated answers.
+    Exact lookups use the normalized query; semantic lookups match near-duplicate
+    queries by cosine similarity of their embeddings, kept unit-normalized in
+    one preallocated matrix so a lookup is a single matrix-vector product.
+    Entries expire after a TTL and the least recently used entry is evicted
+    once max_entries is reached.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 3600, similarity_threshold: float = 0.95) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._url_index: Dict[str, set] = {}
+        # Embedding rows, allocated once the dimension is known; row -> key for rows in use
+        self._matrix: Optional[np.ndarray] = None
+        self._row_keys: List[Optional[str]] = []
+        self._free_rows: List[int] = []
+        self._lock = threading.Lock()
+
+    def _is_expired(self, entry: Dict) -> bool:
+        return time.monotonic() - entry["created_at"] > self.ttl_seconds
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        row = entry["row"]
+        if row is not None:
+            self._matrix[row] = 0.0
+            self._row_keys[row] = None
+            self._free_rows.append(row)
+        for source in entry["response"].get("sources", []):
+            keys = self._url_index.get(source.get("url"))
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self._url_index[source.get("url")]
+
+    def _hit(self, key: str, layer: str) -> Dict:
+        self._entries.move_to_end(key)
+        return {**self._entries[key]["response"], "cache_layer": layer}
+
+    def get(self, query: str) -> Optional[Dict]:
+        key = normalize_query(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self._is_expired(entry):
+                self._remove(key)
+                return None
+            return self._hit(key, "answer_exact")
+
+    def get_similar(self, embedding: Optional[List[float]]) -> Optional[Dict]:
+        if embedding is None:
+            return None
+        query_vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query_vector)
+        if not norm:
+            return None
+        query_vector /= norm
+
+        matrix = self._matrix
+        if matrix is None or matrix.shape[1] != query_vector.shape[0]:
+            return None
+        # Scored without the lock; a row rewritten meanwhile is re-checked below
+        similarities = matrix @ query_vector
+        candidates = np.flatnonzero(similarities >= self.similarity_threshold)
+        with self._lock:
+            if matrix is not self._matrix:
+                return None  # cleared meanwhile
+            for row in candidates[np.argsort(-similarities[candidates])]:
+                key = self._row_keys[row]
+                if key is None:
+                    continue
+                if self._is_expired(self._entries[key]):
+                    self._remove(key)
+                    continue
+                if float(matrix[row] @ query_vector) >= self.similarity_threshold:
+                    return self._hit(key, "answer_semantic")
+            return None
+
+    def _store_vector(self, vector: np.ndarray, key: str) -> Optional[int]:
+        if self._matrix is None:
+            self._matrix = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+            self._row_keys = [None] * self.max_entries
+            self._free_rows = list(range(self.max_entries - 1, -1, -1))
+        if vector.shape[0] != self._matrix.shape[1] or not self._free_rows:
+            return None
+        row = self._free_rows.pop()
+        self._matrix[row] = vector
+        self._row_keys[row] = key
+        return row
+
+    def put(self, query: str, response: Dict, embedding: Optional[List[float]] = None):
+        if self.max_entries <= 0:
+            return
+        key = normalize_query(query)
+        vector = None
+        if embedding is not None:
+            vector = np.asarray(embedding, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            vector = vector / norm if norm else None
+
+        stored = {"answer": response["answer"], "sources": response.get("sources", [])}
+        with self._lock:
+            self._remove(key)
+            while len(self._entries) >= self.max_entries:
+                self._remove(next(iter(self._entries)))
+            row = self._store_vector(vector, key) if vector is not None else None
+            self._entries[key] = {"response": stored, "row": row, "created_at": time.monotonic()}
+            for source in stored["sources"]:
+                self._url_index.setdefault(source.get("url"), set()).add(key)
+
+    def invalidate_urls(self, urls: List[str]) -> int:
+        """Drop every answer that cites one of the given URLs"""
+        with self._lock:
+            keys = set()
+            for url in urls:
+                keys.update(self._url_index.get(url, ()))
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._url_index.clear()
+            self._matrix = None
+            self._row_keys = []
+            self._free_rows = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
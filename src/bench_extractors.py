@@ -0,0 +1,72 @@
+"""
+Micro-benchmark for the HTML extractors in src/extractors.py.
+
+Runs every extractor over a corpus of saved HTML pages and reports throughput
+(pages/s, MB/s) and text quality against the original BeautifulSoup
+extraction (word recall and precision, extracted length):
+
+    python -m src.bench_extractors
+    python -m src.bench_extractors --dir path/to/saved/pages --repeat 20
+"""
+import argparse
+import glob
+import json
+import os
+import time
+from collections import Counter
+from typing import Dict, List
+
+from .extractors import EXTRACTORS, SoupExtractor
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "html")
+
+def word_overlap(reference: str, candidate: str) -> Dict[str, float]:
+    ref, cand = Counter(reference.split()), Counter(candidate.split())
+    common = sum((ref & cand).values())
+    return {
+        "recall": common / max(1, sum(ref.values())),
+        "precision": common / max(1, sum(cand.values())),
+    }
+
+def run(pages: List[bytes], repeat: int) -> Dict[str, Dict]:
+    reference = [SoupExtractor().extract(page, "bench")["content"] for page in pages]
+    total_bytes = sum(len(page) for page in pages) * repeat
+    results = {}
+
+    for name, extractor_class in EXTRACTORS.items():
+        extractor = extractor_class()
+        outputs = []
+        start = time.perf_counter()
+        for _ in range(repeat):
+            outputs = [extractor.extract(page, "bench")["content"] for page in pages]
+        elapsed = time.perf_counter() - start
+
+        overlaps = [word_overlap(ref, out) for ref, out in zip(reference, outputs)]
+        results[name] = {
+            "pages_per_s": round(len(pages) * repeat / elapsed, 1),
+            "mb_per_s": round(total_bytes / elapsed / 1e6, 2),
+            "recall_vs_soup": round(sum(o["recall"] for o in overlaps) / len(overlaps), 3),
+            "precision_vs_soup": round(sum(o["precision"] for o in overlaps) / len(overlaps), 3),
+            "avg_chars": int(sum(len(out) for out in outputs) / len(outputs)),
+        }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare HTML extractors on saved pages")
+    parser.add_argument("--dir", default=FIXTURES_DIR, help="Directory of saved .html pages")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.dir, "*.html")))
+    if not paths:
+        raise SystemExit(f"No .html files found in {args.dir}")
+    pages = []
+    for path in paths:
+        with open(path, "rb") as f:
+            pages.append(f.read())
+
+    print(f"📄 {len(pages)} pages, {sum(len(p) for p in pages) / 1e3:.0f} KB, x{args.repeat}")
+    print(json.dumps(run(pages, args.repeat), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+"""
+Offline end-to-end benchmark.
+
+Runs the crawl, ingest, retrieval, full /search and /search/batch paths against local
+stand-ins only: a local HTTP server serving pages built from the saved HTML
+fixtures, a fake search provider pointing at it, the embedded vector store
+with the hashing embedder and a mock LLM with configurable latency. Reports
+throughput and p50/p95/p99 per stage and writes the results, tagged with the
+commit they were measured on, so runs can be compared across commits:
+
+    python -m src.bench_offline
+    python -m src.bench_offline --pages 200 --queries 50 --llm-latency 0.2
+    python -m src.bench_offline --compare bench_results/<commit>.json
+"""
+import argparse
+import asyncio
+import glob
+import json
+import logging
+import os
+import platform
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from .bench_extractors import FIXTURES_DIR
+from .chunking import TextChunker
+from .crawler import WebCrawler
+from .database import VectorDatabase
+from .embeddings import HashingEmbedder
+from .fetch_cache import FetchCache
+from .local_store import LocalVectorStore
+from .rag import RAGSystem
+
+def summarize(latencies: List[float], elapsed: Optional[float] = None, items: Optional[int] = None) -> Dict:
+    """Latency percentiles in milliseconds, plus throughput when the wall time is known"""
+    if not latencies:
+        return {"count": 0}
+    ordered = sorted(latencies)
+
+    def pct(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000, 3)
+
+    summary = {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+    }
+    if elapsed:
+        summary["per_s"] = round((items if items is not None else len(ordered)) / elapsed, 2)
+    return summary
+
+class FixtureSite:
+    """
+    Local HTTP server with any number of distinct pages.
+    Page i is saved fixture i % n with an article of seeded random paragraphs
+    (drawn from the fixtures' own vocabulary) inserted, so pages keep the
+    real markup but are not collapsed as near-duplicates on ingest.
+    """
+
+    def __init__(self, fixtures_dir: str = FIXTURES_DIR, latency: float = 0.0, paragraphs: int = 12) -> None:
+        self.fixtures = []
+        for path in sorted(glob.glob(os.path.join(fixtures_dir, "*.html"))):
+            with open(path, encoding="utf-8") as f:
+                self.fixtures.append(f.read())
+        if not self.fixtures:
+            raise SystemExit(f"No .html fixtures found in {fixtures_dir}")
+        text = re.sub(r"<[^>]+>", " ", " ".join(self.fixtures))
+        self.vocabulary = sorted(set(re.findall(r"[A-Za-z]{3,}", text)))
+        self.latency = latency
+        self.paragraphs = paragraphs
+        self._server = None
+
+    def page(self, index: int) -> bytes:
+        rng = random.Random(index)
+        paragraphs = "".join(
+            "<p>" + " ".join(rng.choice(self.vocabulary) for _ in range(rng.randint(40, 90))) + ".</p>"
+            for _ in range(self.paragraphs)
+        )
+        html = self.fixtures[index % len(self.fixtures)]
+        article = f"<article><h2>Benchmark page {index}</h2>{paragraphs}</article>"
+        return html.replace("</body>", article + "</body>", 1).encode("utf-8")
+
+    def url(self, index: int) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/page/{index}"
+
+    def start(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                match = re.fullmatch(r"/page/(\d+)", self.path)
+                if not match:
+                    self.send_error(404)
+                    return
+                if site.latency:
+                    time.sleep(site.latency)
+                body = site.page(int(match.group(1)))
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+class FakeSearch:
+    """Search provider returning a deterministic window of the site's pages for each query"""
+
+    def __init__(self, site: FixtureSite, pages: int, latency: float = 0.0) -> None:
+        self.site = site
+        self.pages = pages
+        self.latency = latency
+
+    def __call__(self, query: str, num_results: int = 5) -> List[str]:
+        if self.latency:
+            time.sleep(self.latency)
+        start = zlib.crc32(query.encode("utf-8")) % self.pages
+        return [self.site.url((start + k) % self.pages) for k in range(num_results)]
+
+class _MockCompletions:
+    def __init__(self, latency: float, answer_tokens: int) -> None:
+        self.latency = latency
+        self.answer_tokens = answer_tokens
+
+    def _response(self, kwargs) -> SimpleNamespace:
+        prompt_tokens = sum(len(m["content"].split()) for m in kwargs["messages"])
+        answer = " ".join(["trend"] * self.answer_tokens)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=answer))],
+            usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=self.answer_tokens)
+        )
+
+    def _chunks(self) -> List[SimpleNamespace]:
+        return [
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=" trend"))])
+            for _ in range(self.answer_tokens)
+        ]
+
+class MockLLM:
+    """Stands in for the OpenAI client: answers after a fixed latency"""
+
+    def __init__(self, latency: float = 0.05, answer_tokens: int = 60) -> None:
+        self.chat = SimpleNamespace(completions=self)
+        self._completions = _MockCompletions(latency, answer_tokens)
+
+    def create(self, **kwargs):
+        time.sleep(self._completions.latency)
+        if kwargs.get("stream"):
+            return iter(self._completions._chunks())
+        return self._completions._response(kwargs)
+
+class AsyncMockLLM(MockLLM):
+    async def create(self, **kwargs):
+        await asyncio.sleep(self._completions.latency)
+        if kwargs.get("stream"):
+            async def stream():
+                for chunk in self._completions._chunks():
+                    yield chunk
+            return stream()
+        return self._completions._response(kwargs)
+
+class _RegexTokenizer:
+    """Used only when the tiktoken encoding cannot be loaded offline"""
+
+    def __init__(self) -> None:
+        self._ids: Dict[str, int] = {}
+        self._tokens: List[str] = []
+
+    def encode(self, text: str) -> List[int]:
+        ids = []
+        for token in re.findall(r"\s*\S+", text):
+            if token not in self._ids:
+                self._ids[token] = len(self._tokens)
+                self._tokens.append(token)
+            ids.append(self._ids[token])
+        return ids
+
+    def decode(self, ids: List[int]) -> str:
+        return "".join(self._tokens[i] for i in ids)
+
+def load_tokenizer():
+    try:
+        import tiktoken
+        return tiktoken.encoding_for_model("gpt-3.5-turbo"), "tiktoken"
+    except Exception as e:
+        print(f"⚠️  tiktoken encoding unavailable ({e.__class__.__name__}), using a regex tokenizer")
+        return _RegexTokenizer(), "regex"
+
+def make_queries(site: FixtureSite, count: int, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(site.vocabulary) for _ in range(rng.randint(2, 5))) for _ in range(count)]
+
+def bench_crawl(crawler: WebCrawler, queries: List[str], num_results: int) -> (Dict, List[Dict]):
+    documents: Dict[str, Dict] = {}
+    latencies = []
+
+    async def run():
+        try:
+            for query in queries:
+                start = time.perf_counter()
+                for document in await crawler.search_and_crawl_async(query, num_results=num_results):
+                    documents[document["url"]] = document
+                latencies.append(time.perf_counter() - start)
+        finally:
+            await crawler.aclose()
+
+    start = time.perf_counter()
+    asyncio.run(run())
+    elapsed = time.perf_counter() - start
+    summary = summarize(latencies, elapsed)
+    summary["pages_per_s"] = round(len(documents) / elapsed, 2)
+    return summary, list(documents.values())
+
+def bench_ingest(db: VectorDatabase, documents: List[Dict], batch_size: int) -> Dict:
+    latencies = []
+    stored = 0
+    start = time.perf_counter()
+    for offset in range(0, len(documents), batch_size):
+        batch_start = time.perf_counter()
+        stored += db.ingest(documents[offset:offset + batch_size])["stored"]
+        latencies.append(time.perf_counter() - batch_start)
+    elapsed = time.perf_counter() - start
+    summary = summarize(latencies, elapsed, items=len(documents))
+    summary["chunks_per_s"] = round(stored / elapsed, 2)
+    summary["chunks"] = stored
+    return summary
+
+def bench_retrieval(db: VectorDatabase, queries: List[str], limit: int) -> Dict:
+    latencies = []
+    start = time.perf_counter()
+    for query in queries:
+        query_start = time.perf_counter()
+        db.search(query, limit=limit)
+        latencies.append(time.perf_counter() - query_start)
+    return summarize(latencies, time.perf_counter() - start)
+
+def bench_search(db: VectorDatabase, crawler: WebCrawler, tokenizer, llm_latency: float,
+                 queries: List[str], num_results: int) -> Dict:
+    from fastapi.testclient import TestClient
+    from .answer_cache import AnswerCache
+    from .main import app, components
+
+    logging.getLogger().setLevel(logging.WARNING)
+    rag_system = RAGSystem(
+        db, answer_cache=AnswerCache(), tokenizer=tokenizer,
+        llm_client=MockLLM(llm_latency), async_llm_client=AsyncMockLLM(llm_latency)
+    )
+    components.set("vector_db", db)
+    components.set("rag_system", rag_system)
+    components.set("crawler", crawler)
+
+    results = {}
+    # asyncio.run() in the crawl stage left no current loop, which this TestClient expects
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    with TestClient(app) as client:
+        # First pass misses the answer cache, the second is answered from it
+        for name in ("search_uncached", "search_cached"):
+            latencies = []
+            start = time.perf_counter()
+            for query in queries:
+                request_start = time.perf_counter()
+                response = client.post("/search", json={"query": query, "num_results": num_results})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - request_start)
+            results[name] = summarize(latencies, time.perf_counter() - start)
+
+        # The same queries again as one /search/batch request with the answer cache
+        # cleared; the test client buffers the stream, so only the whole batch is timed
+        rag_system.answer_cache.clear()
+        start = time.perf_counter()
+        response = client.post("/search/batch", json={"queries": queries, "num_results": num_results})
+        response.raise_for_status()
+        elapsed = time.perf_counter() - start
+        results["search_batch"] = summarize([elapsed], elapsed, items=len(queries))
+    return results
+
+def commit_info() -> Dict:
+    def git(*args) -> str:
+        try:
+            return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+        except Exception:
+            return ""
+    return {"commit": git("rev-parse", "HEAD") or "unknown", "dirty": bool(git("status", "--porcelain", "--", "src"))}
+
+def compare(current: Dict, previous_path: str):
+    with open(previous_path, encoding="utf-8") as f:
+        previous = json.load(f)
+    print(f"\n📊 p50 vs {previous['commit'][:12]}")
+    for stage, summary in current["stages"].items():
+        before = previous["stages"].get(stage, {}).get("p50_ms")
+        after = summary.get("p50_ms")
+        if before and after:
+            print(f"  {stage:<16} {before:>10.2f} ms -> {after:>10.2f} ms ({(after - before) / before * 100:+.1f}%)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark with local stand-ins")
+    parser.add_argument("--pages", type=int, default=100, help="Distinct pages served by the local site")
+    parser.add_argument("--queries", type=int, default=30)
+    parser.add_argument("--num-results", type=int, default=5)
+    parser.add_argument("--page-latency", type=float, default=0.0, help="Seconds the local server waits per page")
+    parser.add_argument("--search-latency", type=float, default=0.0, help="Seconds the fake search provider waits")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds the mock LLM waits per completion")
+    parser.add_argument("--ingest-batch", type=int, default=20)
+    parser.add_argument("--output", default="bench_results", help="Directory for the JSON results")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    tokenizer, tokenizer_name = load_tokenizer()
+    site = FixtureSite(latency=args.page_latency)
+    site.start()
+    queries = make_queries(site, args.queries)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ.setdefault("JOBS_DB_PATH", os.path.join(workdir, "jobs.sqlite3"))
+        crawler = WebCrawler(
+            per_host_delay=0.0,  # every page lives on one local host
+            fetch_cache=FetchCache(path=os.path.join(workdir, "fetch_cache.sqlite3")),
+            search_fn=FakeSearch(site, args.pages, args.search_latency)
+        )
+        db = VectorDatabase(
+            chunker=TextChunker(tokenizer=tokenizer),
+            backend=LocalVectorStore(path=os.path.join(workdir, "store"), embed_fn=HashingEmbedder())
+        )
+
+        stages = {}
+        try:
+            print(f"🕷️  crawl: {len(queries)} queries x {args.num_results} pages")
+            stages["crawl"], documents = bench_crawl(crawler, queries, args.num_results)
+            print(f"💾 ingest: {len(documents)} pages")
+            stages["ingest"] = bench_ingest(db, documents, args.ingest_batch)
+            print("🔍 retrieval")
+            stages["retrieval"] = bench_retrieval(db, queries, args.num_results)
+            print("🤖 /search")
+            stages.update(bench_search(db, crawler, tokenizer, args.llm_latency, queries, args.num_results))
+        finally:
+            site.stop()
+
+    results = {
+        **commit_info(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "config": {**vars(args), "tokenizer": tokenizer_name},
+        "stages": stages,
+    }
+    print(json.dumps(results["stages"], indent=2))
+
+    os.makedirs(args.output, exist_ok=True)
+    path = os.path.join(args.output, f"{results['commit'][:12]}{'-dirty' if results['dirty'] else ''}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"📝 Results written to {path}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Load benchmark for the /search endpoint.
+
+Fires concurrent POST /search requests at a running API and reports throughput
+and latency percentiles. Run it against the server before and after a change,
+with the same queries and concurrency, to compare:
+
+    uvicorn src.main:app --port 8000
+    python src/bench_search_load.py --concurrency 1 --requests 20
+    python src/bench_search_load.py --concurrency 10 --requests 100
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import List
+
+import aiohttp
+
+DEFAULT_QUERIES = [
+    "What are the latest developments in AI?",
+    "Current trends in electric vehicles",
+    "What is new in web development?",
+    "Latest trends in renewable energy",
+]
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def run_load(url: str, queries: List[str], total_requests: int, concurrency: int, num_results: int) -> dict:
+    latencies = []
+    errors = 0
+    counter = iter(range(total_requests))
+
+    async def worker(session: aiohttp.ClientSession):
+        nonlocal errors
+        for i in counter:
+            payload = {"query": queries[i % len(queries)], "num_results": num_results}
+            start = time.perf_counter()
+            try:
+                async with session.post(url, json=payload) as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    timeout = aiohttp.ClientTimeout(total=300)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "requests": total_requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total_requests / elapsed, 3) if elapsed else 0.0,
+        "latency_p50_s": round(statistics.median(latencies), 3) if latencies else 0.0,
+        "latency_p95_s": round(percentile(latencies, 95), 3),
+        "latency_max_s": round(max(latencies), 3) if latencies else 0.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent /search load benchmark")
+    parser.add_argument("--url", default="http://localhost:8000/search")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--num-results", type=int, default=5)
+    parser.add_argument("--query", action="append", help="Query to send (repeatable)")
+    args = parser.parse_args()
+
+    result = asyncio.run(run_load(
+        args.url,
+        args.query or DEFAULT_QUERIES,
+        args.requests,
+        args.concurrency,
+        args.num_results,
+    ))
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Cold-start benchmark for the API process.
+
+Every run starts a fresh interpreter and measures importing src.main, running
+the startup events, the first /health/live response and the time until
+/health/ready first reports ready:
+
+    python -m src.bench_startup --runs 5
+    VECTOR_BACKEND=local python -m src.bench_startup --ready-timeout 10
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+def measure_once(ready_timeout: float) -> Dict[str, Optional[float]]:
+    """Runs inside the child interpreter"""
+    start = time.perf_counter()
+    from .main import app
+    from fastapi.testclient import TestClient
+    timings = {"import_s": time.perf_counter() - start}
+
+    with TestClient(app) as client:
+        timings["startup_s"] = time.perf_counter() - start
+        client.get("/health/live")
+        timings["live_s"] = time.perf_counter() - start
+
+        timings["ready_s"] = None
+        deadline = time.perf_counter() + ready_timeout
+        while time.perf_counter() < deadline:
+            if client.get("/health/ready").status_code == 200:
+                timings["ready_s"] = time.perf_counter() - start
+                break
+            time.sleep(0.05)
+    return timings
+
+def summarize(runs: List[Dict[str, Optional[float]]]) -> Dict[str, Dict]:
+    summary = {}
+    for key in ("import_s", "startup_s", "live_s", "ready_s"):
+        values = [run[key] for run in runs if run.get(key) is not None]
+        summary[key] = {
+            "p50": round(statistics.median(values), 3) if values else None,
+            "max": round(max(values), 3) if values else None,
+            "runs": len(values),
+        }
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API import and boot time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--ready-timeout", type=float, default=30)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_once(args.ready_timeout)))
+        return
+
+    runs = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, "-m", "src.bench_startup", "--child", "--ready-timeout", str(args.ready_timeout)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"🚀 {args.runs} cold starts")
+    print(json.dumps(summarize(runs), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Micro-benchmark for context packing with and without the token cache.
+
+Builds a corpus of chunks and whole pages from the saved HTML fixtures,
+then packs the context for many queries, each retrieving a random sample of
+the corpus, the way RAGSystem does before every completion. "cold" clears
+the token and fingerprint caches before each query, which is what every
+query used to cost; "warm" reuses them across queries, as the API does for
+recurring documents.
+Reports CPU time per query for both, with and without the token counts
+stored at ingest:
+
+    python -m src.bench_tokens
+    python -m src.bench_tokens --queries 500 --docs-per-query 20 --context-tokens 1500
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import statistics
+import time
+from typing import Dict, List
+
+from .bench_extractors import FIXTURES_DIR
+from .bench_offline import load_tokenizer
+from .chunking import TextChunker
+from .extractors import create_extractor
+from .rag import RAGSystem
+from .utils import simhash
+
+def build_corpus(tokenizer, variants: int) -> List[Dict]:
+    """Chunks plus whole pages (as stored before chunking), repeated with distinct text"""
+    extractor = create_extractor("lxml")
+    chunker = TextChunker(tokenizer=tokenizer)
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html"))):
+        with open(path, "rb") as f:
+            pages.append(extractor.extract(f.read(), path))
+
+    corpus = []
+    for variant in range(variants):
+        for page in pages:
+            document = {**page, "url": f"{page['url']}#{variant}", "content": f"Copy {variant}. {page['content']}"}
+            corpus.append(document)
+            for chunk in chunker.chunk_document(document):
+                # Chunks carry their fingerprint from ingest, whole pages do not
+                chunk["simhash"] = f"{simhash(chunk['content']):016x}"
+                corpus.append(chunk)
+    for i, doc in enumerate(corpus):
+        doc["id"] = str(i)
+    return corpus
+
+def clear_caches(rag_system: RAGSystem):
+    rag_system.token_cache.clear()
+    rag_system._fingerprints.clear()
+
+def run(rag_system: RAGSystem, queries: List[List[Dict]], cold: bool) -> Dict:
+    clear_caches(rag_system)
+    cpu_ms = []
+    for documents in queries:
+        if cold:
+            clear_caches(rag_system)
+        start = time.process_time()
+        rag_system._pack_context(documents, "What are the latest trends?", None)
+        cpu_ms.append((time.process_time() - start) * 1000)
+    return {
+        "mean_cpu_ms": round(statistics.fmean(cpu_ms), 3),
+        "p50_cpu_ms": round(statistics.median(cpu_ms), 3),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-query CPU saved by the token cache")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--docs-per-query", type=int, default=10)
+    parser.add_argument("--variants", type=int, default=20, help="Distinct copies of each fixture page")
+    parser.add_argument("--context-tokens", type=int, default=2000, help="Context budget, small enough to force truncation")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    tokenizer, tokenizer_name = load_tokenizer()
+    corpus = build_corpus(tokenizer, args.variants)
+    rng = random.Random(args.seed)
+    queries = [rng.sample(corpus, min(args.docs_per_query, len(corpus))) for _ in range(args.queries)]
+    without_counts = [[{k: v for k, v in doc.items() if k != "token_count"} for doc in docs] for docs in queries]
+
+    rag_system = RAGSystem(vector_db=None, tokenizer=tokenizer)
+    rag_system.max_context_tokens = args.context_tokens
+
+    results = {}
+    for name, workload in (("stored_token_counts", queries), ("no_stored_counts", without_counts)):
+        cold = run(rag_system, workload, cold=True)
+        warm = run(rag_system, workload, cold=False)
+        results[name] = {
+            "cold": cold,
+            "warm": warm,
+            "saved_cpu_ms_per_query": round(cold["mean_cpu_ms"] - warm["mean_cpu_ms"], 3),
+            "speedup": round(cold["mean_cpu_ms"] / warm["mean_cpu_ms"], 1) if warm["mean_cpu_ms"] else None,
+        }
+    results["token_cache"] = rag_system.token_cache.stats()
+
+    print(f"🔤 {len(corpus)} documents, {args.queries} queries x {args.docs_per_query} docs, tokenizer: {tokenizer_name}")
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import tiktoken
+from typing import Dict, List, Tuple
+
+class TextChunker:
+    """Splits page text into overlapping, token-bounded chunks for embedding"""
+
+    def __init__(self, tokenizer=None, chunk_tokens: int = 400, overlap_tokens: int = 50) -> None:
+        if overlap_tokens >= chunk_tokens:
+            raise ValueError("overlap_tokens must be smaller than chunk_tokens")
+        self.tokenizer = tokenizer or tiktoken.encoding_for_model("gpt-3.5-turbo")
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+
+    def split_text(self, text: str) -> List[Tuple[str, int]]:
+        """Return (chunk_text, token_count) windows covering the whole text"""
+        tokens = self.tokenizer.encode(text)
+        if not tokens:
+            return []
+
+        step = self.chunk_tokens - self.overlap_tokens
+        chunks = []
+        for start in range(0, len(tokens), step):
+            window = tokens[start:start + self.chunk_tokens]
+            chunks.append((self.tokenizer.decode(window).strip(), len(window)))
+            if start + self.chunk_tokens >= len(tokens):
+                break
+        return chunks
+
+    def chunk_document(self, document: Dict[str, str]) -> List[Dict]:
+        chunks = []
+        for index, (text, token_count) in enumerate(self.split_text(document.get("content", ""))):
+            chunks.append({
+                "content": text,
+                "url": document["url"],
+                "title": document.get("title", "No Title"),
+                "parent_url": document["url"],
+                "chunk_index": index,
+                "token_count": token_count
+            })
+        return chunks
+
+    def chunk_documents(self, documents: List[Dict[str, str]]) -> List[Dict]:
+        chunks = []
+        for document in documents:
+            chunks.extend(self.chunk_document(document))
+        return chunks
@@ -0,0 +1,42 @@
+"""
+Process-wide API clients.
+Each client is created on first use and then shared, so every caller reuses
+the same keep-alive connection pool instead of opening its own. The openai
+package itself is imported on first use too; it accounts for about half of
+the API's import time.
+"""
+import os
+import threading
+
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+
+_lock = threading.Lock()
+_openai_client = None
+_async_openai_client = None
+
+def get_openai_client():
+    global _openai_client
+    with _lock:
+        if _openai_client is None:
+            from openai import OpenAI
+
+            _openai_client = OpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                timeout=OPENAI_TIMEOUT,
+                max_retries=OPENAI_MAX_RETRIES
+            )
+        return _openai_client
+
+def get_async_openai_client():
+    global _async_openai_client
+    with _lock:
+        if _async_openai_client is None:
+            from openai import AsyncOpenAI
+
+            _async_openai_client = AsyncOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                timeout=OPENAI_TIMEOUT,
+                max_retries=OPENAI_MAX_RETRIES
+            )
+        return _async_openai_client
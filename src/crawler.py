@@ -1,76 +1,396 @@
-from googlesearch import search
 import requests
-from bs4 import BeautifulSoup
-from typing import List, Dict
+from requests.adapters import HTTPAdapter
+import aiohttp
+import asyncio
+from typing import Callable, Iterable, List, Dict, Optional
 import logging
 import os
-from urllib.parse import urljoin
+import threading
 import time
 
+from . import metrics
+from .concurrency import SingleFlight, run_blocking
+from .extractors import ContentExtractor, create_extractor, decode_body
+from .fetch_cache import FetchCache
+from .host_scheduler import HostScheduler, HostUnavailable, RobotsCache, host_of, parse_retry_after
+from .search_providers import create_search_provider
+from .utils import content_hash
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+MIN_CONTENT_LENGTH = 100  # Ensure we have meaningful content
+# Responses larger than this are rejected before parsing
+MAX_RESPONSE_BYTES = int(os.getenv("MAX_RESPONSE_BYTES", str(5 * 1024 * 1024)))
+READ_CHUNK_SIZE = 65536
+# Search results requested per wanted page; the spares backfill failed fetches without searching again
+SEARCH_OVERFETCH = int(os.getenv("SEARCH_OVERFETCH", "2"))
+
+class ResponseRejected(Exception):
+    """Raised for responses that are not worth parsing (non-HTML or too large)"""
+
+def _is_overloaded(status: int) -> bool:
+    """Responses telling us to back off the host"""
+    return status == 429 or status >= 500
+
+def create_host_scheduler(per_host_delay: float = 1.0) -> HostScheduler:
+    return HostScheduler(
+        base_delay=per_host_delay,
+        max_delay=float(os.getenv("CRAWL_MAX_BACKOFF", "60")),
+        failure_threshold=int(os.getenv("CRAWL_FAILURE_THRESHOLD", "5")),
+        open_seconds=float(os.getenv("CRAWL_CIRCUIT_SECONDS", "300")),
+        # Seconds of fetching each host may use per CRAWL_BUDGET_WINDOW seconds
+        time_budget=float(os.getenv("CRAWL_HOST_TIME_BUDGET", "60")),
+        budget_window=float(os.getenv("CRAWL_BUDGET_WINDOW", "600"))
+    )
+
 class WebCrawler:
-    def __init__(self):
-        self.visited_urls = set()
+    def __init__(self, max_concurrency: int = 5, per_host_delay: float = 1.0, request_timeout: float = 10,
+                 fetch_cache: Optional[FetchCache] = None, extractor: Optional[ContentExtractor] = None,
+                 search_fn: Optional[Callable[..., Iterable[str]]] = None,
+                 scheduler: Optional[HostScheduler] = None, respect_robots: Optional[bool] = None):
+        # Persistent, bounded record of fetched pages; replaces the old in-memory visited set
+        if fetch_cache is None:
+            fetch_cache = FetchCache(
+                path=os.getenv("FETCH_CACHE_PATH", "data/fetch_cache.sqlite3"),
+                max_entries=int(os.getenv("FETCH_CACHE_MAX_ENTRIES", "50000")),
+                fresh_seconds=float(os.getenv("FETCH_CACHE_FRESH_SECONDS", str(6 * 3600)))
+            )
+        self.fetch_cache = fetch_cache
+        self.extractor = extractor or create_extractor(os.getenv("HTML_EXTRACTOR", "lxml"))
+        # search(query, num_results=...) -> result URLs; the configured SearchProvider unless one is injected
+        self.search_fn = search_fn or create_search_provider()
+        self.max_concurrency = max_concurrency
+        self.request_timeout = request_timeout
+        # Per-host request spacing, backoff, circuit breaker and time budget
+        self.scheduler = scheduler or create_host_scheduler(per_host_delay)
+        if respect_robots is None:
+            respect_robots = os.getenv("RESPECT_ROBOTS_TXT", "true").lower() in ("1", "true", "yes")
+        self.robots = RobotsCache(
+            user_agent=os.getenv("ROBOTS_USER_AGENT", "*"),
+            ttl_seconds=float(os.getenv("ROBOTS_CACHE_TTL", str(24 * 3600)))
+        ) if respect_robots else None
+        self._robots_flight = SingleFlight()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop = None
+        self._http: Optional[requests.Session] = None
+        self._http_lock = threading.Lock()
+
+    def _record_fetch(self, url: str, start: float, healthy: Optional[bool], retry_after: Optional[float] = None):
+        """Feed a fetch outcome to the scheduler; healthy is None when the host never answered"""
+        elapsed = time.monotonic() - start
+        if healthy:
+            self.scheduler.record_success(url, elapsed)
+        else:
+            self.scheduler.record_failure(url, elapsed, retry_after)
+
+    def _store_robots(self, url: str, status: Optional[int], text: str = ""):
+        return self.robots.put(url, status, text)
+
+    def _apply_robots(self, parser, url: str) -> bool:
+        # Set on every fetch, so it survives the scheduler forgetting an idle host
+        self.scheduler.set_crawl_delay(url, self.robots.crawl_delay(parser))
+        return self.robots.allowed(parser, url)
+
+    def _robots_allows(self, url: str) -> bool:
+        if self.robots is None:
+            return True
+        parser = self.robots.get(url)
+        if parser is None:
+            try:
+                response = self._get_http().get(RobotsCache.robots_url(url), timeout=self.request_timeout)
+                parser = self._store_robots(url, response.status_code, response.text)
+            except requests.RequestException:
+                parser = self._store_robots(url, None)
+        return self._apply_robots(parser, url)
+
+    async def _fetch_robots(self, url: str):
+        session = await self._get_session()
+        try:
+            async with session.get(RobotsCache.robots_url(url)) as response:
+                text = await response.text(errors="replace") if response.status < 300 else ""
+                return self._store_robots(url, response.status, text)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return self._store_robots(url, None)
+
+    async def _arobots_allows(self, url: str) -> bool:
+        if self.robots is None:
+            return True
+        parser = self.robots.get(url)
+        if parser is None:
+            # Pages of one host crawled together share a single robots.txt fetch
+            parser = await self._robots_flight.do(host_of(url), lambda: self._fetch_robots(url))
+        return self._apply_robots(parser, url)
+
+    def _parse_html(self, html, url: str) -> Dict[str, str]:
+        return self.extractor.extract(html, url)
+
+    def _check_response(self, headers):
+        """Reject non-HTML and oversized responses from their headers alone"""
+        content_type = headers.get("Content-Type", "")
+        if content_type and "html" not in content_type.lower():
+            raise ResponseRejected(f"non-HTML content type {content_type}")
+        content_length = headers.get("Content-Length")
+        if content_length and content_length.isdigit() and int(content_length) > MAX_RESPONSE_BYTES:
+            raise ResponseRejected(f"response of {content_length} bytes exceeds {MAX_RESPONSE_BYTES}")
+
+    def _add_chunk(self, body: bytearray, chunk: bytes):
+        body.extend(chunk)
+        # Content-Length can be missing or wrong, so enforce the cap while reading too
+        if len(body) > MAX_RESPONSE_BYTES:
+            raise ResponseRejected(f"response exceeds {MAX_RESPONSE_BYTES} bytes")
+
+    def _store_fetch(self, document: Dict[str, str], entry: Optional[Dict], headers) -> Dict[str, str]:
+        """Cache a freshly fetched page; not_modified tells callers whether its text changed"""
+        not_modified = entry is not None and entry["content_hash"] == content_hash(document["content"])
+        self.fetch_cache.put(document, headers.get("ETag"), headers.get("Last-Modified"))
+        return {**document, "not_modified": not_modified}
+
+    def _parse_and_store(self, body: bytes, url: str, entry: Optional[Dict], headers) -> Dict[str, str]:
+        html = decode_body(body, headers.get("Content-Type"))
+        with metrics.timer("parse"):
+            document = self._parse_html(html, url)
+        return self._store_fetch(document, entry, headers)
 
     def get_page_content(self, url: str) -> Dict[str, str]:
+        """
+        Fetch and parse a page. Fresh cached pages are served without a request,
+        stale ones are revalidated with a conditional GET. Returned documents
+        carry not_modified=True when their text is unchanged since the last crawl.
+        """
+        try:
+            entry = self.fetch_cache.get(url)
+            if entry and self.fetch_cache.is_fresh(entry):
+                metrics.FETCHES.inc(outcome="cache_fresh")
+                return self.fetch_cache.to_document(entry)
+
+            if not self._robots_allows(url):
+                metrics.FETCHES.inc(outcome="robots_disallowed")
+                logging.info(f"Skipping {url}: disallowed by robots.txt")
+                return None
+
+            # Be nice to servers: space out hits to the same host, longer when it struggles
+            wait = self.scheduler.reserve(url)
+            if wait > 0:
+                with metrics.timer("host_wait"):
+                    time.sleep(wait)
+
+            headers = self.fetch_cache.conditional_headers(entry)
+            timeout = self.scheduler.timeout_for(url, self.request_timeout)
+            start, healthy, retry_after = time.monotonic(), None, None
+            try:
+                with metrics.timer("fetch"):
+                    with self._get_http().get(url, headers=headers, timeout=timeout, stream=True) as response:
+                        healthy = not _is_overloaded(response.status_code)
+                        if not healthy:
+                            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                        if response.status_code == 304 and entry:
+                            body = None
+                        else:
+                            response.raise_for_status()
+                            self._check_response(response.headers)
+                            body = bytearray()
+                            for chunk in response.iter_content(READ_CHUNK_SIZE):
+                                self._add_chunk(body, chunk)
+            except Exception:
+                self._record_fetch(url, start, healthy, retry_after)
+                raise
+            self._record_fetch(url, start, True)
+
+            if body is None:
+                self.fetch_cache.touch(url)
+                metrics.FETCHES.inc(outcome="not_modified")
+                return self.fetch_cache.to_document(entry)
+            metrics.FETCHES.inc(outcome="fetched")
+            metrics.BYTES_FETCHED.inc(len(body))
+            return self._parse_and_store(bytes(body), url, entry, response.headers)
+        except ResponseRejected as e:
+            metrics.FETCHES.inc(outcome="rejected")
+            logging.warning(f"Skipping {url}: {str(e)}")
+            return None
+        except HostUnavailable as e:
+            metrics.FETCHES.inc(outcome="host_unavailable")
+            logging.warning(f"Skipping {url}: {str(e)}")
+            return None
+        except Exception as e:
+            metrics.FETCHES.inc(outcome="error")
+            logging.error(f"Error crawling {url}: {str(e)}")
+            return None
+
+    def _get_http(self) -> requests.Session:
+        """Shared keep-alive session for the synchronous crawler"""
+        with self._http_lock:
+            if self._http is None:
+                self._http = requests.Session()
+                self._http.headers.update(HEADERS)
+                adapter = HTTPAdapter(pool_connections=self.max_concurrency * 2, pool_maxsize=self.max_concurrency)
+                self._http.mount("http://", adapter)
+                self._http.mount("https://", adapter)
+            return self._http
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Shared pooled session, recreated if the previous one belongs to another event loop"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency * 2, limit_per_host=self.max_concurrency)
+            self._session = aiohttp.ClientSession(
+                headers=HEADERS,
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout)
+            )
+            self._session_loop = loop
+        return self._session
+
+    async def aclose(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        with self._http_lock:
+            if self._http is not None:
+                self._http.close()
+            self._http = None
+
+    async def fetch_page_content(self, url: str) -> Optional[Dict[str, str]]:
+        """Async counterpart of get_page_content using the shared session"""
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Remove unwanted elements
-            for element in soup.find_all(['script', 'style', 'nav', 'footer', 'header']):
-                element.decompose()
-
-            # Get title
-            title = soup.title.string if soup.title else "No Title"
-            
-            # Get main content
-            paragraphs = soup.find_all('p')
-            content = ' '.join(p.get_text().strip() for p in paragraphs)
-            
-            # Clean up text
-            content = ' '.join(content.split())
-            
-            return {
-                "title": title,
-                "content": content,
-                "url": url
-            }
+            entry = await run_blocking(self.fetch_cache.get, url)
+            if entry and self.fetch_cache.is_fresh(entry):
+                metrics.FETCHES.inc(outcome="cache_fresh")
+                return self.fetch_cache.to_document(entry)
+
+            if not await self._arobots_allows(url):
+                metrics.FETCHES.inc(outcome="robots_disallowed")
+                logging.info(f"Skipping {url}: disallowed by robots.txt")
+                return None
+
+            wait = self.scheduler.reserve(url)
+            start, healthy, retry_after = None, None, None
+            try:
+                if wait > 0:
+                    with metrics.timer("host_wait"):
+                        await asyncio.sleep(wait)
+                session = await self._get_session()
+                timeout = aiohttp.ClientTimeout(total=self.scheduler.timeout_for(url, self.request_timeout))
+                start = time.monotonic()
+                with metrics.timer("fetch"):
+                    async with session.get(url, headers=self.fetch_cache.conditional_headers(entry),
+                                           timeout=timeout) as response:
+                        healthy = not _is_overloaded(response.status)
+                        if not healthy:
+                            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                        if response.status == 304 and entry:
+                            body = None
+                        else:
+                            response.raise_for_status()
+                            self._check_response(response.headers)
+                            body = bytearray()
+                            async for chunk in response.content.iter_chunked(READ_CHUNK_SIZE):
+                                self._add_chunk(body, chunk)
+                        headers = response.headers
+            except asyncio.CancelledError:
+                # Abandoned, while waiting for the host or fetching, because
+                # enough pages arrived: not the host's fault
+                self.scheduler.release(url)
+                raise
+            except Exception:
+                if start is None:
+                    # Failed before the request went out
+                    self.scheduler.release(url)
+                else:
+                    self._record_fetch(url, start, healthy, retry_after)
+                raise
+            self._record_fetch(url, start, True)
+
+            if body is None:
+                await run_blocking(self.fetch_cache.touch, url)
+                metrics.FETCHES.inc(outcome="not_modified")
+                return self.fetch_cache.to_document(entry)
+            metrics.FETCHES.inc(outcome="fetched")
+            metrics.BYTES_FETCHED.inc(len(body))
+            # Parsing is CPU-bound, keep it off the event loop
+            return await run_blocking(self._parse_and_store, bytes(body), url, entry, headers)
+        except asyncio.CancelledError:
+            raise
+        except ResponseRejected as e:
+            metrics.FETCHES.inc(outcome="rejected")
+            logging.warning(f"Skipping {url}: {str(e)}")
+            return None
+        except HostUnavailable as e:
+            metrics.FETCHES.inc(outcome="host_unavailable")
+            logging.warning(f"Skipping {url}: {str(e)}")
+            return None
         except Exception as e:
+            metrics.FETCHES.inc(outcome="error")
             logging.error(f"Error crawling {url}: {str(e)}")
             return None
 
+    def _search(self, query: str, num_results: int) -> List[str]:
+        """Candidate URLs for a query, SEARCH_OVERFETCH times as many as pages wanted"""
+        with metrics.timer("web_search"):
+            return list(dict.fromkeys(self.search_fn(query, num_results=num_results * max(1, SEARCH_OVERFETCH))))
+
     def search_and_crawl(self, query: str, num_results: int = 5) -> List[Dict[str, str]]:
         documents = []
-        logging.info(f"🔍 Searching Google for: {query}")
-        
+        logging.info(f"🔍 Searching the web for: {query}")
+
         try:
-            # Get search results
-            search_results = search(query, num_results=num_results)
-            
-            for url in search_results:
-                if url in self.visited_urls:
-                    continue
-                
+            # Candidates past the first num_results only get fetched to replace failures
+            for url in self._search(query, num_results):
                 logging.info(f"Crawling: {url}")
                 document = self.get_page_content(url)
-                
-                if document and len(document["content"]) > 100:  # Ensure we have meaningful content
+
+                if document and len(document["content"]) > MIN_CONTENT_LENGTH:
                     documents.append(document)
-                    self.visited_urls.add(url)
-                
-                # Be nice to servers
-                time.sleep(1)
-                
+
                 if len(documents) >= num_results:
                     break
-            
+
             logging.info(f"✅ Crawled {len(documents)} pages")
             return documents
-            
+
         except Exception as e:
             logging.error(f"Error in search and crawl: {str(e)}")
-            return documents
\ No newline at end of file
+            return documents
+
+    async def search_and_crawl_async(self, query: str, num_results: int = 5) -> List[Dict[str, str]]:
+        """
+        Concurrent version of search_and_crawl.
+        Fetches up to max_concurrency pages at once over a pooled session and
+        returns as soon as num_results good documents have arrived. Only as
+        many fetches run as documents are still missing; spare search results
+        are fetched one by one to backfill pages that fail.
+        """
+        documents = []
+        logging.info(f"🔍 Searching the web for: {query}")
+
+        try:
+            # Search providers are blocking, run them in a worker thread
+            candidates = iter(await run_blocking(self._search, query, num_results))
+            in_flight = set()
+            try:
+                while len(documents) < num_results:
+                    wanted = min(self.max_concurrency, num_results - len(documents))
+                    for url in candidates:
+                        logging.info(f"Crawling: {url}")
+                        in_flight.add(asyncio.ensure_future(self.fetch_page_content(url)))
+                        if len(in_flight) >= wanted:
+                            break
+                    if not in_flight:
+                        break
+                    done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        document = task.result()
+                        if document and len(document["content"]) > MIN_CONTENT_LENGTH and len(documents) < num_results:
+                            documents.append(document)
+            finally:
+                # Cancel the fetches still in flight once we have enough
+                for task in in_flight:
+                    task.cancel()
+                await asyncio.gather(*in_flight, return_exceptions=True)
+
+            logging.info(f"✅ Crawled {len(documents)} pages")
+            return documents
+
+        except Exception as e:
+            logging.error(f"Error in search and crawl: {str(e)}")
+            return documents
@@ -1,151 +1,786 @@
 import weaviate
+from weaviate.config import Config, ConnectionConfig
 import os
 from dotenv import load_dotenv
-from typing import List, Dict
+from typing import Iterable, Iterator, List, Dict, Optional, Sequence, Tuple
+from contextlib import contextmanager
 import logging
+import queue
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+from . import metrics
+from .chunking import TextChunker
+from .clients import get_openai_client
+from .embeddings import HashingEmbedder, OpenAIEmbedder
+from .ingest import IngestPipeline
+from .local_store import LocalVectorStore
+from .retrieval import fuse, rerank
+from .storage import StorageBackend
+from .utils import content_hash, hamming_distance, simhash, simhash_bands
 
 load_dotenv()
 
-class VectorDatabase:
+# Must match the text2vec-openai model configured in the schema below
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
+
+# Properties returned with every search hit
+DOCUMENT_PROPERTIES = ["content", "url", "title", "parent_url", "chunk_index", "token_count", "content_hash", "simhash"]
+
+# Light projection returned by document listings unless other properties are asked for
+LISTING_PROPERTIES = ["title", "url", "parent_url", "chunk_index", "token_count"]
+# Largest page a single listing request may ask for
+MAX_LISTING_PAGE = 1000
+
+# Selective deletes remove this many objects per batch and sleep between
+# batches, so a large delete does not monopolize the store
+DELETE_BATCH_SIZE = int(os.getenv("DELETE_BATCH_SIZE", "500"))
+DELETE_BATCH_PAUSE = float(os.getenv("DELETE_BATCH_PAUSE", "0.05"))
+
+# Pages whose SimHash differs in at most this many bits are treated as duplicates
+NEAR_DUPLICATE_BITS = int(os.getenv("NEAR_DUPLICATE_BITS", "3"))
+# Stored pages are matched by exact SimHash bands, which finds every page within
+# SIMHASH_BANDS - 1 bits; pages further apart are only collapsed within a batch
+SIMHASH_BANDS = 4
+
+# Keep-alive connections each Weaviate client keeps open
+WEAVIATE_POOL_SIZE = int(os.getenv("WEAVIATE_POOL_SIZE", "20"))
+# (connect, read) timeouts in seconds for Weaviate requests
+WEAVIATE_TIMEOUT = (
+    float(os.getenv("WEAVIATE_CONNECT_TIMEOUT", "5")),
+    float(os.getenv("WEAVIATE_READ_TIMEOUT", "60"))
+)
+
+# Upper bound on objects returned by a single filter query
+QUERY_LIMIT = 10000
+# Vector searches bundled into one GraphQL request by search_many
+MULTI_GET_SIZE = int(os.getenv("WEAVIATE_MULTI_GET_SIZE", "16"))
+
+# "vector" is pure vector search, one lookup per query. "hybrid" fuses BM25
+# keyword matches with vector hits; on Weaviate that costs two more round trips
+# per query (the BM25 search, then a near_vector lookup for its hits' distances)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "vector")
+# Fusion method (rrf or relative_score) and the weight of the vector side
+HYBRID_FUSION = os.getenv("HYBRID_FUSION", "rrf")
+HYBRID_ALPHA = float(os.getenv("HYBRID_ALPHA", "0.5"))
+# Each side of a hybrid search fetches limit * HYBRID_CANDIDATES hits before fusion
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "4"))
+# Optional rerank of the fused candidates (none or overlap)
+RETRIEVAL_RERANK = os.getenv("RETRIEVAL_RERANK", "none")
+
+DOCUMENT_SCHEMA = {
+    "class": "Document",
+    "vectorizer": "text2vec-openai",
+    "moduleConfig": {
+        "text2vec-openai": {
+            "model": "ada",
+            "modelVersion": "002",
+            "type": "text"
+        }
+    },
+    "properties": [
+        {
+            "name": "content",
+            "dataType": ["text"],
+            "moduleConfig": {
+                "text2vec-openai": {
+                    "skip": False,
+                    "vectorizePropertyName": False
+                }
+            }
+        },
+        {
+            "name": "url",
+            "dataType": ["string"],
+            "moduleConfig": {
+                "text2vec-openai": {
+                    "skip": True
+                }
+            }
+        },
+        {
+            "name": "title",
+            "dataType": ["string"],
+            "moduleConfig": {
+                "text2vec-openai": {
+                    "skip": False
+                }
+            }
+        },
+        {
+            "name": "parent_url",
+            "dataType": ["string"],
+            "moduleConfig": {
+                "text2vec-openai": {
+                    "skip": True
+                }
+            }
+        },
+        {
+            "name": "chunk_index",
+            "dataType": ["int"]
+        },
+        {
+            "name": "token_count",
+            "dataType": ["int"]
+        },
+        {
+            "name": "content_hash",
+            "dataType": ["string"],
+            "moduleConfig": {
+                "text2vec-openai": {
+                    "skip": True
+                }
+            }
+        },
+        {
+            # SimHash of the whole page and its bands, for near-duplicate lookups at ingest
+            "name": "page_simhash",
+            "dataType": ["string"],
+            "moduleConfig": {
+                "text2vec-openai": {
+                    "skip": True
+                }
+            }
+        },
+        {
+            "name": "simhash_bands",
+            "dataType": ["string[]"],
+            "moduleConfig": {
+                "text2vec-openai": {
+                    "skip": True
+                }
+            }
+        },
+        {
+            # 64-bit SimHash of the chunk text as 16 hex digits
+            "name": "simhash",
+            "dataType": ["string"],
+            "moduleConfig": {
+                "text2vec-openai": {
+                    "skip": True
+                }
+            }
+        }
+    ]
+}
+
+def _any_equal(path: str, values: List[str]) -> Dict:
+    """Weaviate where filter matching objects whose property equals any of the values"""
+    operands = [{"path": [path], "operator": "Equal", "valueText": value} for value in values]
+    if len(operands) == 1:
+        return operands[0]
+    return {"operator": "Or", "operands": operands}
+
+
+class WeaviateBackend(StorageBackend):
+    """
+    Weaviate Cloud storage, vectorized server-side by text2vec-openai.
+    The client connects on first use, so constructing the backend never
+    blocks on (or fails because of) the network.
+    """
+
     def __init__(self):
-        self.client = weaviate.Client(
+        self._client: Optional[weaviate.Client] = None
+        self._client_lock = threading.Lock()
+        # The v3 client keeps one shared batch buffer, so concurrent ingest
+        # workers each check out a client of their own
+        self._batch_clients: "queue.LifoQueue" = queue.LifoQueue()
+
+    @property
+    def client(self) -> weaviate.Client:
+        with self._client_lock:
+            if self._client is None:
+                self._client = self._create_client()
+            return self._client
+
+    @property
+    def embedding_client(self):
+        return get_openai_client()
+
+    def _create_client(self) -> weaviate.Client:
+        return weaviate.Client(
             url=os.getenv("WEAVIATE_URL"),
             auth_client_secret=weaviate.AuthApiKey(api_key=os.getenv("WEAVIATE_API_KEY")),
             additional_headers={
                 "X-OpenAI-Api-Key": os.getenv("OPENAI_API_KEY")
-            }
+            },
+            timeout_config=WEAVIATE_TIMEOUT,
+            # Fail fast instead of polling for up to 5s when Weaviate is down
+            startup_period=None,
+            additional_config=Config(
+                connection_config=ConnectionConfig(
+                    session_pool_connections=WEAVIATE_POOL_SIZE,
+                    session_pool_maxsize=WEAVIATE_POOL_SIZE
+                )
+            )
         )
-        self.setup_schema()
 
-    def check_connection(self):
+    @contextmanager
+    def _batch_client(self):
         try:
-            if self.client.is_ready():
-                logging.info("Successfully connected to Weaviate Cloud!")
-                return True
-            else:
-                logging.error("Weaviate is not ready!")
-                return False
-        except Exception as e:
-            logging.error(f"Error connecting to Weaviate: {str(e)}")
-            return False
+            client = self._batch_clients.get_nowait()
+        except queue.Empty:
+            client = self._create_client()
+        try:
+            yield client
+        finally:
+            self._batch_clients.put(client)
 
-    def setup_schema(self):
-        schema = {
-            "class": "Document",
-            "vectorizer": "text2vec-openai",
-            "moduleConfig": {
-                "text2vec-openai": {
-                    "model": "ada",
-                    "modelVersion": "002",
-                    "type": "text"
-                }
-            },
-            "properties": [
-                {
-                    "name": "content",
-                    "dataType": ["text"],
-                    "moduleConfig": {
-                        "text2vec-openai": {
-                            "skip": False,
-                            "vectorizePropertyName": False
-                        }
-                    }
-                },
-                {
-                    "name": "url",
-                    "dataType": ["string"],
-                    "moduleConfig": {
-                        "text2vec-openai": {
-                            "skip": True
-                        }
-                    }
-                },
-                {
-                    "name": "title",
-                    "dataType": ["string"],
-                    "moduleConfig": {
-                        "text2vec-openai": {
-                            "skip": False
-                        }
-                    }
-                }
-            ]
-        }
+    def is_ready(self) -> bool:
+        return self.client.is_ready()
 
+    def setup(self):
         try:
             # Check if schema exists
             existing_schema = self.client.schema.get()
-            if any(class_obj["class"] == "Document" for class_obj in existing_schema["classes"]):
+            existing_class = next(
+                (class_obj for class_obj in existing_schema["classes"] if class_obj["class"] == "Document"),
+                None
+            )
+            if existing_class:
                 logging.info("Schema already exists")
+                self._add_missing_properties(existing_class, DOCUMENT_SCHEMA["properties"])
                 return
 
             # Create schema
-            self.client.schema.create_class(schema)
+            self.client.schema.create_class(DOCUMENT_SCHEMA)
             logging.info("Schema created successfully")
         except Exception as e:
             logging.error(f"Error with schema: {str(e)}")
             raise
 
-    def add_documents(self, documents: List[Dict[str, str]]):
+    def _add_missing_properties(self, existing_class: Dict, properties: List[Dict]):
+        """Bring a class created by an older version up to date with the current properties"""
+        existing_names = {prop["name"] for prop in existing_class.get("properties", [])}
+        for prop in properties:
+            if prop["name"] not in existing_names:
+                self.client.schema.property.create("Document", prop)
+                logging.info(f"Added missing property: {prop['name']}")
+
+    def embed_query(self, query: str) -> Optional[List[float]]:
+        return self.embed_queries([query])[0]
+
+    def embed_queries(self, queries: List[str]) -> List[Optional[List[float]]]:
+        # Same model as the server-side vectorizer, so the vectors are comparable
+        response = self.embedding_client.embeddings.create(model=EMBEDDING_MODEL, input=queries)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    def add_objects(self, objects: List[Dict]) -> List[Dict]:
+        """Insert one batch and return the objects Weaviate rejected"""
+        if not objects:
+            return []
+        with self._batch_client() as client:
+            for obj in objects:
+                # "id" is reserved in Weaviate; it becomes the object UUID instead
+                properties = {key: value for key, value in obj.items() if key != "id"}
+                client.batch.add_data_object(
+                    data_object=properties,
+                    class_name="Document",
+                    uuid=obj.get("id")
+                )
+            try:
+                results = client.batch.create_objects() or []
+            finally:
+                # A failed request leaves the objects buffered on the pooled
+                # client, where the retry or the next batch would send them again
+                client.batch.empty_objects()
+
+        failed_ids = set()
+        for result in results:
+            errors = (result.get("result") or {}).get("errors")
+            if errors:
+                failed_ids.add(result.get("id"))
+                logging.warning(f"Object {result.get('id')} rejected: {errors}")
+        return [obj for obj in objects if obj.get("id") in failed_ids]
+
+    def get_page_index(self, urls: List[str], content_hashes: List[str],
+                       simhash_bands: Sequence[str] = ()) -> List[Dict]:
+        filters = []
+        if urls:
+            filters.append(_any_equal("parent_url", urls))
+        if content_hashes:
+            filters.append(_any_equal("content_hash", content_hashes))
+        if simhash_bands:
+            # Equal on an array property matches objects holding the value
+            filters.append(_any_equal("simhash_bands", list(simhash_bands)))
+        if not filters:
+            return []
+        where = filters[0] if len(filters) == 1 else {"operator": "Or", "operands": filters}
+
+        response = (
+            self.client.query
+            .get("Document", ["parent_url", "content_hash", "page_simhash"])
+            .with_where(where)
+            .with_limit(QUERY_LIMIT)
+            .do()
+        )
+        entries = {
+            (obj.get("parent_url"), obj.get("content_hash"), obj.get("page_simhash"))
+            for obj in response["data"]["Get"]["Document"]
+        }
+        return [
+            {"parent_url": url, "content_hash": page_hash, "page_simhash": page_simhash}
+            for url, page_hash, page_simhash in entries
+        ]
+
+    def _delete_where(self, where: Dict) -> int:
+        """Delete every match, repeating the batch delete since each call stops at QUERY_LIMIT objects"""
+        deleted = 0
+        while True:
+            results = self.client.batch.delete_objects(class_name="Document", where=where)["results"]
+            deleted += results.get("successful", 0)
+            if results.get("matches", 0) < results.get("limit", QUERY_LIMIT) or not results.get("successful"):
+                return deleted
+
+    def delete_pages(self, urls: List[str]) -> int:
+        return self._delete_where(_any_equal("parent_url", urls)) if urls else 0
+
+    def delete_objects(self, ids: List[str]) -> int:
+        return self._delete_where(_any_equal("id", ids)) if ids else 0
+
+    def _search_builder(self, query: str, limit: int, vector: Optional[List[float]]):
+        builder = self.client.query.get("Document", DOCUMENT_PROPERTIES)
+        if vector is not None:
+            builder = builder.with_near_vector({"vector": vector})
+        else:
+            builder = builder.with_near_text({"concepts": [query]})
+        return builder.with_additional(["id", "distance"]).with_limit(limit)
+
+    def _unpack_hits(self, documents: List[Dict]) -> List[Dict]:
+        for doc in documents:
+            additional = doc.pop("_additional", None) or {}
+            doc["id"] = additional.get("id")
+            doc["distance"] = additional.get("distance")
+        return documents
+
+    def search(self, query: str, limit: int = 5, vector: Optional[List[float]] = None) -> List[Dict]:
+        response = self._search_builder(query, limit, vector).do()
+        return self._unpack_hits(response["data"]["Get"]["Document"])
+
+    def search_many(self, queries: List[str], limit: int = 5,
+                    vectors: Optional[List[Optional[List[float]]]] = None) -> List[List[Dict]]:
+        # Several aliased Get queries per GraphQL request instead of one round trip per query
+        vectors = vectors or [None] * len(queries)
+        results = []
+        for start in range(0, len(queries), MULTI_GET_SIZE):
+            builders = [
+                self._search_builder(query, limit, vector).with_alias(f"q{i}")
+                for i, (query, vector) in enumerate(zip(queries[start:start + MULTI_GET_SIZE],
+                                                        vectors[start:start + MULTI_GET_SIZE]))
+            ]
+            response = self.client.query.multi_get(builders).do()
+            if response.get("errors"):
+                raise RuntimeError(str(response["errors"]))
+            data = response["data"]["Get"]
+            results.extend(self._unpack_hits(data.get(f"q{i}") or []) for i in range(len(builders)))
+        return results
+
+    def keyword_search(self, query: str, limit: int = 5, vector: Optional[List[float]] = None) -> List[Dict]:
+        response = (
+            self.client.query
+            .get("Document", DOCUMENT_PROPERTIES)
+            .with_bm25(query=query, properties=["content", "title"])
+            .with_additional(["id", "score"])
+            .with_limit(limit)
+            .do()
+        )
+
+        documents = response["data"]["Get"]["Document"]
+        for doc in documents:
+            additional = doc.pop("_additional", None) or {}
+            doc["id"] = additional.get("id")
+            doc["bm25_score"] = float(additional.get("score") or 0.0)
+            doc["distance"] = None
+        if vector is not None and documents:
+            # BM25 results carry no distance, so look it up for just these objects
+            distances = self._distances(vector, [doc["id"] for doc in documents])
+            for doc in documents:
+                doc["distance"] = distances.get(doc["id"])
+        return documents
+
+    def _distances(self, vector: List[float], ids: List[str]) -> Dict[str, float]:
+        response = (
+            self.client.query
+            .get("Document", [])
+            .with_near_vector({"vector": vector})
+            .with_where(_any_equal("id", ids))
+            .with_additional(["id", "distance"])
+            .with_limit(len(ids))
+            .do()
+        )
+        return {
+            doc["_additional"]["id"]: doc["_additional"]["distance"]
+            for doc in response["data"]["Get"]["Document"]
+        }
+
+    def list_objects(self, properties: List[str], after: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        # Cursor API: pages in id order without the offset cost of deep pagination
+        query = (
+            self.client.query
+            .get("Document", properties)
+            .with_additional(["id", "creationTimeUnix"])
+            .with_limit(limit)
+        )
+        if after:
+            query = query.with_after(after)
+        documents = query.do()["data"]["Get"]["Document"]
+        for doc in documents:
+            additional = doc.pop("_additional", None) or {}
+            doc["id"] = additional.get("id")
+            created = additional.get("creationTimeUnix")
+            doc["ingested_at"] = int(created) / 1000 if created else None
+        return documents
+
+    def clear(self):
+        self._delete_where({"operator": "NotNull", "path": ["id"]})
+
+def create_backend(name: Optional[str] = None) -> StorageBackend:
+    """Build the storage backend selected by VECTOR_BACKEND (weaviate or local)"""
+    name = (name or os.getenv("VECTOR_BACKEND", "weaviate")).lower()
+    if name == "weaviate":
+        return WeaviateBackend()
+    if name == "local":
+        embedder = os.getenv("LOCAL_EMBEDDER", "hashing").lower()
+        embed_fn = OpenAIEmbedder(EMBEDDING_MODEL) if embedder == "openai" else HashingEmbedder()
+        return LocalVectorStore(path=os.getenv("LOCAL_STORE_PATH", "data/vector_store"), embed_fn=embed_fn)
+    raise ValueError(f"Unknown vector backend: {name}")
+
+class VectorDatabase:
+    def __init__(self, chunker: Optional[TextChunker] = None, backend: Optional[StorageBackend] = None):
+        self.chunker = chunker or TextChunker()
+        self.backend = backend or create_backend()
+        self.retrieval_mode = RETRIEVAL_MODE
+        self.fusion = HYBRID_FUSION
+        self.alpha = HYBRID_ALPHA
+        self.candidates = HYBRID_CANDIDATES
+        self.reranker = RETRIEVAL_RERANK
+        self.setup_schema()
+
+    @property
+    def default_max_distance(self) -> float:
+        """Cosine distance under which a hit counts as relevant, for the backend's embeddings"""
+        return self.backend.default_max_distance
+
+    def check_connection(self):
+        try:
+            if self.backend.is_ready():
+                logging.info("Successfully connected to the vector store!")
+                return True
+            else:
+                logging.error("Vector store is not ready!")
+                return False
+        except Exception as e:
+            logging.error(f"Error connecting to the vector store: {str(e)}")
+            return False
+
+    def setup_schema(self):
+        self.backend.setup()
+
+    def _collapse_near_duplicates(self, documents: List[Dict[str, str]]):
+        """Yield (document, content_hash, simhash) for pages that are not near-duplicates of an earlier one"""
+        fingerprints = []
+        for doc in documents:
+            if not doc.get("content"):
+                continue
+            fingerprint = simhash(doc["content"])
+            if any(hamming_distance(fingerprint, seen) <= NEAR_DUPLICATE_BITS for seen in fingerprints):
+                logging.info(f"Skipping near-duplicate page: {doc['url']}")
+                continue
+            fingerprints.append(fingerprint)
+            yield doc, content_hash(doc["content"]), fingerprint
+
+    def _chunk_page(self, document: Dict[str, str], page_hash: str, page_simhash: int) -> List[Dict]:
+        chunks = self.chunker.chunk_document(document)
+        bands = simhash_bands(page_simhash, SIMHASH_BANDS)
+        for chunk in chunks:
+            # Deterministic IDs: re-ingesting the same page version addresses the same objects
+            chunk["content_hash"] = page_hash
+            chunk["page_simhash"] = f"{page_simhash:016x}"
+            chunk["simhash_bands"] = bands
+            # Fingerprint for spotting repeated passages when packing a context
+            chunk["simhash"] = f"{simhash(chunk['content']):016x}"
+            chunk["id"] = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{document['url']}#{page_hash}#{chunk['chunk_index']}"))
+        return chunks
+
+    def prepare_documents(self, documents: List[Dict[str, str]],
+                          seen_hashes: Optional[Dict[str, str]] = None) -> Tuple[List[Dict], List[str], Dict[str, int]]:
+        """
+        Deduplicate a batch of pages against the store and chunk what is left.
+        Returns (chunks to write, URLs whose old chunks must be deleted first,
+        new/updated/skipped counts). Pages are skipped when identical to or a
+        near-duplicate of a page stored under another URL; seen_hashes carries
+        content hashes across batches of the same ingest run.
+        """
+        report = {"new": 0, "updated": 0, "skipped": 0}
+        seen_hashes = {} if seen_hashes is None else seen_hashes
+        pages = list(self._collapse_near_duplicates(documents))
+        report["skipped"] = len(documents) - len(pages)
+
+        existing = self.backend.get_page_index(
+            [doc["url"] for doc, _, _ in pages],
+            [page_hash for _, page_hash, _ in pages],
+            sorted({band for _, _, fingerprint in pages for band in simhash_bands(fingerprint, SIMHASH_BANDS)})
+        )
+        hash_by_url = {entry["parent_url"]: entry["content_hash"] for entry in existing}
+        url_by_hash = {entry["content_hash"]: entry["parent_url"] for entry in existing}
+        url_by_hash.update(seen_hashes)
+        stored_fingerprints = {
+            (int(entry["page_simhash"], 16), entry["parent_url"]) for entry in existing if entry.get("page_simhash")
+        }
+
+        changed_urls = []
+        chunks = []
+        for doc, page_hash, fingerprint in pages:
+            url = doc["url"]
+            if hash_by_url.get(url) == page_hash or url_by_hash.get(page_hash, url) != url:
+                # Same page version, or identical content already stored under another URL
+                report["skipped"] += 1
+                continue
+            if any(
+                stored_url != url and hamming_distance(fingerprint, stored) <= NEAR_DUPLICATE_BITS
+                for stored, stored_url in stored_fingerprints
+            ):
+                logging.info(f"Skipping near-duplicate of a stored page: {url}")
+                report["skipped"] += 1
+                continue
+            if url in hash_by_url:
+                changed_urls.append(url)
+                report["updated"] += 1
+            else:
+                report["new"] += 1
+            url_by_hash[page_hash] = seen_hashes[page_hash] = url
+            chunks.extend(self._chunk_page(doc, page_hash, fingerprint))
+        return chunks, changed_urls, report
+
+    def ingest(self, documents: Iterable[Dict[str, str]], **pipeline_options) -> Dict:
+        """
+        Stream documents of any length through the batched ingest pipeline.
+        See IngestPipeline for the options; returns the run report.
+        """
+        with metrics.timer("ingest"):
+            report = IngestPipeline(self, **pipeline_options).run(documents)
+        logging.info(
+            f"Stored {report['stored']} chunks: {report['new']} new, {report['updated']} updated, "
+            f"{report['skipped']} skipped documents, {report['failed']} failed objects "
+            f"({report['chunks_per_s']} chunks/s)"
+        )
+        return report
+
+    def add_documents(self, documents: List[Dict[str, str]]) -> Dict:
+        """
+        Upsert pages as token-bounded chunks, one object per chunk.
+        Unchanged pages are skipped without re-embedding, changed pages replace
+        their old chunks and near-duplicate pages are collapsed.
+        Returns the ingest report (new, updated, skipped, failed, ...).
+        """
+        return self.ingest(documents)
+
+    def embed_query(self, query: str) -> Optional[List[float]]:
+        """
+        Embed a query client-side with the backend's embedding model, so the
+        vector can be reused for the search and for the semantic answer cache
+        """
         try:
-            with self.client.batch as batch:
-                for doc in documents:
-                    batch.add_data_object(
-                        data_object={
-                            "content": doc["content"],
-                            "url": doc["url"],
-                            "title": doc["title"]
-                        },
-                        class_name="Document"
-                    )
-            logging.info(f"Successfully added {len(documents)} documents")
+            with metrics.timer("embed_query"):
+                return self.backend.embed_query(query)
         except Exception as e:
-            logging.error(f"Error adding documents: {str(e)}")
+            logging.error(f"Error embedding query: {str(e)}")
+            return None
 
-    def search(self, query: str, limit: int = 5) -> List[Dict]:
+    def embed_queries(self, queries: List[str]) -> List[Optional[List[float]]]:
+        """Embed a batch of queries in one model call; all None if embedding fails"""
         try:
-            response = (
-                self.client.query
-                .get("Document", ["content", "url", "title"])
-                .with_near_text({"concepts": [query]})
-                .with_limit(limit)
-                .do()
-            )
-            
-            return response["data"]["Get"]["Document"]
+            with metrics.timer("embed_query"):
+                return self.backend.embed_queries(queries)
+        except Exception as e:
+            logging.error(f"Error embedding queries: {str(e)}")
+            return [None] * len(queries)
+
+    def search(self, query: str, limit: int = 5, vector: Optional[List[float]] = None,
+               mode: Optional[str] = None) -> List[Dict]:
+        """
+        Vector or hybrid search; each hit carries its object id, cosine distance
+        and a ranking score (plus bm25_score in hybrid mode).
+        Pass a precomputed query vector to skip vectorizing the query again.
+        """
+        try:
+            if (mode or self.retrieval_mode) == "hybrid":
+                return self._hybrid_search(query, limit, vector)
+            with metrics.timer("vector_search"):
+                documents = self.backend.search(query, limit=limit, vector=vector)
+            for doc in documents:
+                doc["score"] = 1.0 - doc["distance"] if doc.get("distance") is not None else None
+            return documents
         except Exception as e:
             logging.error(f"Error searching: {str(e)}")
             return []
 
-    def view_stored_data(self):
+    def search_many(self, queries: List[str], limit: int = 5,
+                    vectors: Optional[List[Optional[List[float]]]] = None,
+                    mode: Optional[str] = None) -> List[List[Dict]]:
+        """
+        search() for a batch of queries: the vector side runs as one batched
+        lookup, keyword matches and fusion still go query by query.
+        Returns one hit list per query, in order.
+        """
+        vectors = vectors or [None] * len(queries)
+        hybrid = (mode or self.retrieval_mode) == "hybrid"
         try:
-            response = (
-                self.client.query
-                .get("Document", ["content", "url", "title"])
-                .with_limit(100)  # Get first 10 documents
-                .do()
-            )
-            
-            documents = response["data"]["Get"]["Document"]
-            print(f"\n📚 Found {len(documents)} documents in database:")
+            with metrics.timer("vector_search"):
+                vector_hits = self.backend.search_many(
+                    queries, limit=limit * max(1, self.candidates) if hybrid else limit, vectors=vectors
+                )
+        except Exception as e:
+            logging.error(f"Error searching: {str(e)}")
+            return [[] for _ in queries]
+
+        results = []
+        for query, vector, hits in zip(queries, vectors, vector_hits):
+            if hybrid:
+                results.append(self._hybrid_search(query, limit, vector, hits))
+                continue
+            for doc in hits:
+                doc["score"] = 1.0 - doc["distance"] if doc.get("distance") is not None else None
+            results.append(hits)
+        return results
+
+    def _hybrid_search(self, query: str, limit: int, vector: Optional[List[float]],
+                       vector_hits: Optional[List[Dict]] = None) -> List[Dict]:
+        candidates = limit * max(1, self.candidates)
+        if vector_hits is None:
+            with metrics.timer("vector_search"):
+                vector_hits = self.backend.search(query, limit=candidates, vector=vector)
+        try:
+            with metrics.timer("keyword_search"):
+                keyword_hits = self.backend.keyword_search(query, limit=candidates, vector=vector)
+        except Exception as e:
+            logging.warning(f"Keyword search failed, using vector hits only: {str(e)}")
+            keyword_hits = []
+
+        with metrics.timer("fusion"):
+            hits = fuse(vector_hits, keyword_hits, self.fusion, self.alpha)
+            return rerank(query, hits[:candidates], self.reranker)[:limit]
+
+    def list_documents(self, cursor: Optional[str] = None, limit: int = 100,
+                       properties: Optional[List[str]] = None) -> Dict:
+        """
+        One page of stored chunks in id order, as {"documents", "next_cursor"}.
+        Documents are light projections (LISTING_PROPERTIES plus id and
+        ingested_at) unless other properties are asked for; pass next_cursor
+        back to get the following page. next_cursor is None on the last page.
+        """
+        properties = list(properties or LISTING_PROPERTIES)
+        unknown = [name for name in properties if name not in DOCUMENT_PROPERTIES]
+        if unknown:
+            raise ValueError(f"Unknown document properties: {', '.join(unknown)}")
+        if not 1 <= limit <= MAX_LISTING_PAGE:
+            raise ValueError(f"limit must be between 1 and {MAX_LISTING_PAGE}")
+
+        documents = self.backend.list_objects(properties, after=cursor, limit=limit)
+        next_cursor = documents[-1]["id"] if len(documents) == limit else None
+        return {"documents": documents, "next_cursor": next_cursor}
+
+    def iter_documents(self, properties: Optional[List[str]] = None,
+                       page_size: int = MAX_LISTING_PAGE) -> Iterator[Dict]:
+        """Walk the whole store page by page, holding one page in memory at a time"""
+        cursor = None
+        while True:
+            page = self.list_documents(cursor, page_size, properties)
+            yield from page["documents"]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return
+
+    def _scan_matches(self, domains: List[str], older_than: Optional[float]) -> Iterator[Dict]:
+        """Walk the store and yield the objects from one of the domains or ingested before older_than"""
+        domains = [domain.lower().lstrip(".") for domain in domains]
+        for doc in self.iter_documents(["url", "parent_url"]):
+            if older_than is not None and doc.get("ingested_at") is not None and doc["ingested_at"] < older_than:
+                yield doc
+                continue
+            host = (urlparse(doc.get("parent_url") or doc.get("url") or "").hostname or "").lower()
+            if host and any(host == domain or host.endswith("." + domain) for domain in domains):
+                yield doc
+
+    def delete_documents(self, urls: Optional[List[str]] = None, domains: Optional[List[str]] = None,
+                         older_than: Optional[float] = None, query: Optional[str] = None,
+                         query_limit: int = 10, batch_size: int = DELETE_BATCH_SIZE,
+                         pause: float = DELETE_BATCH_PAUSE) -> Dict:
+        """
+        Delete the chunks matching any of the criteria: pages by URL, pages
+        from a domain (subdomains included), chunks ingested before the Unix
+        time older_than, or the top query_limit search hits for a query.
+        Objects go in batches of batch_size with a pause in between, so
+        concurrent searches keep getting the store. Returns the number of
+        objects deleted, the batches used and the affected page URLs.
+        """
+        if not (urls or domains or older_than is not None or query):
+            raise ValueError("No deletion criteria given")
+
+        report = {"deleted": 0, "batches": 0, "urls": set()}
+
+        def delete_batch(docs: List[Dict]):
+            if report["batches"]:
+                time.sleep(pause)
+            report["deleted"] += self.backend.delete_objects([doc["id"] for doc in docs])
+            report["batches"] += 1
+            report["urls"].update(doc.get("parent_url") or doc.get("url") for doc in docs)
+
+        urls = list(urls or [])
+        for start in range(0, len(urls), batch_size):
+            if report["batches"]:
+                time.sleep(pause)
+            report["deleted"] += self.backend.delete_pages(urls[start:start + batch_size])
+            report["batches"] += 1
+            report["urls"].update(urls[start:start + batch_size])
+
+        if query:
+            hits = self.search(query, limit=query_limit)
+            for start in range(0, len(hits), batch_size):
+                delete_batch(hits[start:start + batch_size])
+
+        if domains or older_than is not None:
+            batch = []
+            for doc in self._scan_matches(domains or [], older_than):
+                batch.append(doc)
+                if len(batch) >= batch_size:
+                    delete_batch(batch)
+                    batch = []
+            if batch:
+                delete_batch(batch)
+
+        report["urls"] = sorted(url for url in report["urls"] if url)
+        logging.info(f"Deleted {report['deleted']} objects in {report['batches']} batches")
+        return report
+
+    def view_stored_data(self, limit: int = 20, cursor: Optional[str] = None) -> Optional[str]:
+        """Print one page of stored chunks and return the cursor of the next page"""
+        try:
+            page = self.list_documents(cursor, limit, LISTING_PROPERTIES + ["content"])
+            documents = page["documents"]
+            print(f"\n📚 Showing {len(documents)} documents from the database:")
             for i, doc in enumerate(documents, 1):
                 print(f"\n--- Document {i} ---")
-                print(f"Title: {doc.get('title', 'No Title')}")
-                print(f"URL: {doc.get('url', 'No URL')}")
-                print(f"Content Preview: {doc.get('content', 'No Content')[:200]}...")
+                print(f"Title: {doc.get('title') or 'No Title'}")
+                print(f"URL: {doc.get('url') or 'No URL'}")
+                print(f"Content Preview: {(doc.get('content') or 'No Content')[:200]}...")
                 print("-" * 50)
-            
+            if page["next_cursor"]:
+                print(f"\nMore documents follow; next cursor: {page['next_cursor']}")
+            return page["next_cursor"]
+
         except Exception as e:
             print(f"Error viewing data: {str(e)}")
+            return None
 
     def clear_documents(self):
         """Clear all documents from the database"""
         try:
-            self.client.batch.delete_objects(
-                class_name="Document",
-                where={"operator": "NotNull", "path": ["id"]}
-            )
+            self.backend.clear()
             logging.info("Successfully cleared all documents")
         except Exception as e:
             logging.error(f"Error clearing documents: {str(e)}")
-            raise e
\ No newline at end of file
+            raise e
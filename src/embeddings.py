@@ -0,0 +1,60 @@
+import hashlib
+import re
+from typing import TYPE_CHECKING, List, Optional
+
+import numpy as np
+
+from .clients import get_openai_client
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+class HashingEmbedder:
+    """
+    Dependency-free local embedding function based on signed feature hashing
+    of words and word bigrams. Lexical rather than semantic, but deterministic
+    and fast, which makes it suitable for tests and air-gapped deployments.
+    """
+
+    # Distances only reflect shared words: a query phrased like a stored chunk
+    # lands around 0.6-0.75, unrelated text around 0.9-1.0
+    default_max_distance = 0.85
+
+    def __init__(self, dim: int = 384) -> None:
+        self.dim = dim
+
+    def _bucket(self, feature: str):
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % self.dim, 1.0 if value >> 63 else -1.0
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = TOKEN_PATTERN.findall(text.lower())
+            features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+            for feature in features:
+                index, sign = self._bucket(feature)
+                vectors[row, index] += sign
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+class OpenAIEmbedder:
+    """Embedding function backed by the OpenAI embeddings API"""
+
+    default_max_distance = 0.25
+
+    def __init__(self, model: str = "text-embedding-ada-002", client: Optional["OpenAI"] = None, batch_size: int = 256) -> None:
+        self.model = model
+        self.client = client or get_openai_client()
+        self.batch_size = batch_size
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            response = self.client.embeddings.create(model=self.model, input=texts[start:start + self.batch_size])
+            vectors.extend(item.embedding for item in response.data)
+        return np.asarray(vectors, dtype=np.float32)
@@ -0,0 +1,147 @@
+import re
+from typing import Dict, Optional, Union
+
+from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
+
+# Elements whose text never belongs to the main content
+UNWANTED_TAGS = ("script", "style", "nav", "footer", "header", "noscript", "aside", "form")
+
+CHARSET_PATTERN = re.compile(r"charset=([\w-]+)", re.IGNORECASE)
+
+def decode_body(body: bytes, content_type: Optional[str]) -> Union[str, bytes]:
+    """
+    Decode a response body using the charset from its Content-Type header.
+    Without one the raw bytes are returned so the parser can honour <meta charset>.
+    """
+    match = CHARSET_PATTERN.search(content_type or "")
+    if not match:
+        return body
+    try:
+        return body.decode(match.group(1), errors="replace")
+    except LookupError:
+        return body
+
+def _clean(text: str) -> str:
+    return " ".join(text.split())
+
+class ContentExtractor:
+    """Turns an HTML page into a {"title", "content", "url"} document"""
+    name = "base"
+
+    def extract(self, html: Union[str, bytes], url: str) -> Dict[str, str]:
+        raise NotImplementedError
+
+class SoupExtractor(ContentExtractor):
+    """Original BeautifulSoup/html.parser extraction; slow but lenient"""
+    name = "soup"
+
+    def extract(self, html: Union[str, bytes], url: str) -> Dict[str, str]:
+        soup = BeautifulSoup(html, 'html.parser')
+
+        # Remove unwanted elements
+        for element in soup.find_all(['script', 'style', 'nav', 'footer', 'header']):
+            element.decompose()
+
+        # Get title
+        title = soup.title.string if soup.title else "No Title"
+
+        # Get main content
+        paragraphs = soup.find_all('p')
+        content = ' '.join(p.get_text().strip() for p in paragraphs)
+
+        return {
+            "title": title,
+            "content": _clean(content),
+            "url": url
+        }
+
+class LxmlExtractor(ContentExtractor):
+    """SoupExtractor's paragraph rules on top of lxml's C parser"""
+    name = "lxml"
+
+    def extract(self, html: Union[str, bytes], url: str) -> Dict[str, str]:
+        encoding = None
+        if isinstance(html, str):
+            # lxml refuses str input that carries an XML encoding declaration
+            html, encoding = html.encode("utf-8"), "utf-8"
+        tree = lxml.html.fromstring(html, parser=lxml.html.HTMLParser(encoding=encoding, remove_comments=True))
+        title = _clean(tree.findtext(".//title") or "") or "No Title"
+
+        etree.strip_elements(tree, *UNWANTED_TAGS, with_tail=False)
+        content = " ".join(p.text_content() for p in tree.iter("p"))
+
+        return {
+            "title": title,
+            "content": _clean(content),
+            "url": url
+        }
+
+class StreamingExtractor(ContentExtractor):
+    """
+    Incremental extraction with lxml's pull parser.
+    Feeds the page in chunks, drops link-heavy boilerplate paragraphs and
+    stops parsing once max_chars of text have been gathered.
+    """
+    name = "streaming"
+
+    def __init__(self, max_chars: int = 20000, chunk_size: int = 16384, max_link_density: float = 0.5) -> None:
+        self.max_chars = max_chars
+        self.chunk_size = chunk_size
+        self.max_link_density = max_link_density
+
+    def _is_boilerplate(self, paragraph, text: str) -> bool:
+        link_text = sum(len(_clean("".join(a.itertext()))) for a in paragraph.iter("a"))
+        return link_text > self.max_link_density * len(text)
+
+    def extract(self, html: Union[str, bytes], url: str) -> Dict[str, str]:
+        encoding = None
+        if isinstance(html, str):
+            html, encoding = html.encode("utf-8"), "utf-8"
+        parser = etree.HTMLPullParser(events=("start", "end"), encoding=encoding, remove_comments=True)
+        title = None
+        paragraphs = []
+        gathered = 0
+        skip_depth = 0
+
+        for start in range(0, len(html), self.chunk_size):
+            parser.feed(html[start:start + self.chunk_size])
+            for event, element in parser.read_events():
+                tag = element.tag if isinstance(element.tag, str) else ""
+                if tag in UNWANTED_TAGS:
+                    skip_depth += 1 if event == "start" else -1
+                    if event == "end":
+                        element.clear()
+                    continue
+                if event != "end":
+                    continue
+                if tag == "title" and title is None:
+                    title = _clean("".join(element.itertext()))
+                elif tag == "p" and skip_depth == 0:
+                    text = _clean("".join(element.itertext()))
+                    if text and not self._is_boilerplate(element, text):
+                        paragraphs.append(text)
+                        gathered += len(text) + 1
+                    element.clear(keep_tail=True)
+            if gathered >= self.max_chars:
+                break
+
+        content = " ".join(paragraphs)[:self.max_chars]
+        return {
+            "title": title or "No Title",
+            "content": content,
+            "url": url
+        }
+
+EXTRACTORS = {
+    SoupExtractor.name: SoupExtractor,
+    LxmlExtractor.name: LxmlExtractor,
+    StreamingExtractor.name: StreamingExtractor,
+}
+
+def create_extractor(name: str = "lxml") -> ContentExtractor:
+    try:
+        return EXTRACTORS[name.lower()]()
+    except KeyError:
+        raise ValueError(f"Unknown HTML extractor: {name}")
@@ -0,0 +1,126 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .utils import content_hash
+
+class FetchCache:
+    """
+    Persistent per-URL cache of fetched pages backed by SQLite.
+    Stores the validators (ETag, Last-Modified) needed for conditional
+    re-fetches together with the extracted text. Entries younger than
+    fresh_seconds are served without touching the network, and the least
+    recently used entries are pruned beyond max_entries.
+    """
+
+    def __init__(self, path: str = "data/fetch_cache.sqlite3", max_entries: int = 50000,
+                 fresh_seconds: float = 6 * 3600) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.fresh_seconds = fresh_seconds
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    content_hash TEXT,
+                    title TEXT,
+                    content TEXT,
+                    fetched_at REAL,
+                    accessed_at REAL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages (accessed_at)")
+
+    def get(self, url: str) -> Optional[Dict]:
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT * FROM pages WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE pages SET accessed_at = ? WHERE url = ?", (time.time(), url))
+        return dict(row)
+
+    def is_fresh(self, entry: Dict) -> bool:
+        return time.time() - entry["fetched_at"] < self.fresh_seconds
+
+    def conditional_headers(self, entry: Optional[Dict]) -> Dict[str, str]:
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def put(self, document: Dict[str, str], etag: Optional[str] = None, last_modified: Optional[str] = None):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO pages
+                    (url, etag, last_modified, content_hash, title, content, fetched_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (document["url"], etag, last_modified, content_hash(document["content"]),
+                 document["title"], document["content"], now, now)
+            )
+            self._writes_since_prune += 1
+            if self._writes_since_prune >= 100:
+                self._prune()
+
+    def touch(self, url: str):
+        """Mark an entry as revalidated (e.g. after a 304 Not Modified)"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE url = ?", (now, now, url))
+
+    def delete(self, urls: List[str]) -> int:
+        """Forget pages, so their next crawl is a full fetch rather than a 304"""
+        with self._lock, self._conn:
+            return sum(
+                self._conn.execute("DELETE FROM pages WHERE url = ?", (url,)).rowcount for url in urls
+            )
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM pages")
+
+    def _prune(self):
+        self._writes_since_prune = 0
+        self._conn.execute(
+            """
+            DELETE FROM pages WHERE url IN (
+                SELECT url FROM pages ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_entries,)
+        )
+
+    def to_document(self, entry: Dict, not_modified: bool = True) -> Dict:
+        return {
+            "title": entry["title"],
+            "content": entry["content"],
+            "url": entry["url"],
+            "not_modified": not_modified
+        }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
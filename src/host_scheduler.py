@@ -0,0 +1,228 @@
+"""
+Per-host politeness for the crawler.
+
+HostScheduler spaces requests to each host by its own delay: the base delay,
+raised to the robots.txt Crawl-delay when there is one, and backed off
+exponentially (or per Retry-After) after 429 and 5xx responses, timeouts and
+connection errors. A host that keeps failing trips a circuit breaker and is
+skipped until a cool-down has passed, after which a single trial request
+decides whether it closes again. Each host also gets a budget of fetch time
+per window, so one slow site cannot eat a whole crawl. Beyond max_hosts,
+hosts that are back to their defaults are forgotten.
+
+RobotsCache keeps parsed robots.txt files per host. The crawler fetches the
+files itself (synchronously or over its async session) and stores the
+result here.
+"""
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+class HostUnavailable(Exception):
+    """Raised for hosts whose circuit is open or whose time budget is spent"""
+
+def host_of(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class _HostState:
+    __slots__ = ("next_slot", "crawl_delay", "failures", "open_until", "trial_in_flight",
+                 "window_start", "spent")
+
+    def __init__(self, now: float) -> None:
+        self.next_slot = now
+        self.crawl_delay = 0.0
+        self.failures = 0  # consecutive
+        self.open_until = 0.0
+        self.trial_in_flight = False
+        self.window_start = now
+        self.spent = 0.0  # fetch seconds in the current budget window
+
+class HostScheduler:
+    def __init__(self, base_delay: float = 1.0, max_delay: float = 60.0, max_crawl_delay: float = 30.0,
+                 failure_threshold: int = 5, open_seconds: float = 300.0,
+                 time_budget: float = 60.0, budget_window: float = 600.0, max_hosts: int = 10000) -> None:
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_crawl_delay = max_crawl_delay
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.time_budget = time_budget
+        self.budget_window = budget_window
+        self.max_hosts = max_hosts
+        self._hosts: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+
+    def _is_idle(self, state: _HostState, now: float) -> bool:
+        """
+        True when forgetting the host changes nothing: its next slot has passed
+        and it has no backoff, open circuit or spent budget. The crawl delay
+        does not count, the crawler sets it from robots.txt before every fetch.
+        """
+        return (
+            state.next_slot <= now and state.failures == 0
+            and not state.trial_in_flight
+            and (state.spent == 0 or now - state.window_start >= self.budget_window)
+        )
+
+    def _evict(self, now: float):
+        idle = [host for host, state in self._hosts.items() if self._is_idle(state, now)]
+        for host in idle:
+            del self._hosts[host]
+        if len(self._hosts) >= self.max_hosts:
+            # Every host is still being held back: drop the oldest healthy one,
+            # keeping backoff and circuit state as long as possible
+            healthy = (host for host, state in self._hosts.items() if state.failures == 0)
+            self._hosts.pop(next(healthy, next(iter(self._hosts))))
+
+    def _state(self, host: str, now: float) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            if len(self._hosts) >= self.max_hosts:
+                self._evict(now)
+            state = self._hosts[host] = _HostState(now)
+        if now - state.window_start >= self.budget_window:
+            state.window_start, state.spent = now, 0.0
+        return state
+
+    def _delay(self, state: _HostState) -> float:
+        return max(self.base_delay, state.crawl_delay)
+
+    def set_crawl_delay(self, url: str, delay: Optional[float]):
+        with self._lock:
+            state = self._state(host_of(url), time.monotonic())
+            state.crawl_delay = min(self.max_crawl_delay, delay or 0.0)
+
+    def reserve(self, url: str) -> float:
+        """
+        Reserve the host's next request slot and return how long to wait for
+        it. Raises HostUnavailable while the circuit is open or the host's
+        time budget is spent.
+        """
+        host = host_of(url)
+        now = time.monotonic()
+        with self._lock:
+            state = self._state(host, now)
+            if state.spent >= self.time_budget:
+                raise HostUnavailable(f"time budget of {self.time_budget:.0f}s spent for {host}")
+            if state.failures >= self.failure_threshold:
+                if now < state.open_until or state.trial_in_flight:
+                    raise HostUnavailable(f"circuit open for {host}")
+                # Half-open: let a single trial request through
+                state.trial_in_flight = True
+            slot = max(now, state.next_slot)
+            state.next_slot = slot + self._delay(state)
+            return slot - now
+
+    def timeout_for(self, url: str, default: float) -> float:
+        """Request timeout for the host, cut down to what is left of its time budget"""
+        with self._lock:
+            state = self._state(host_of(url), time.monotonic())
+            return max(1.0, min(default, self.time_budget - state.spent))
+
+    def record_success(self, url: str, elapsed: float):
+        with self._lock:
+            state = self._state(host_of(url), time.monotonic())
+            state.spent += elapsed
+            state.failures = 0
+            state.trial_in_flight = False
+
+    def record_failure(self, url: str, elapsed: float, retry_after: Optional[float] = None):
+        """A 429 or 5xx response, timeout or connection error: back the host off"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._state(host_of(url), now)
+            state.spent += elapsed
+            state.failures += 1
+            state.trial_in_flight = False
+            backoff = min(self.max_delay, max(self._delay(state), 1.0) * 2 ** state.failures)
+            if retry_after is not None:
+                backoff = max(backoff, min(retry_after, self.open_seconds))
+            state.next_slot = max(state.next_slot, now + backoff)
+            if state.failures >= self.failure_threshold:
+                state.open_until = now + self.open_seconds
+
+    def release(self, url: str):
+        """Give back a half-open trial whose request was abandoned before it finished"""
+        with self._lock:
+            self._state(host_of(url), time.monotonic()).trial_in_flight = False
+
+    def stats(self) -> Dict[str, int]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "hosts": len(self._hosts),
+                "backing_off": sum(1 for s in self._hosts.values() if 0 < s.failures < self.failure_threshold),
+                "circuit_open": sum(
+                    1 for s in self._hosts.values() if s.failures >= self.failure_threshold and now < s.open_until
+                ),
+                "over_budget": sum(1 for s in self._hosts.values() if s.spent >= self.time_budget),
+            }
+
+class RobotsCache:
+    """
+    Parsed robots.txt per host, kept for ttl_seconds. Following RFC 9309, a
+    missing file (4xx) allows everything, while an unreachable one (5xx or
+    network error) disallows the host until error_ttl_seconds have passed.
+    """
+
+    def __init__(self, user_agent: str = "*", ttl_seconds: float = 24 * 3600,
+                 error_ttl_seconds: float = 600, max_hosts: int = 10000) -> None:
+        self.user_agent = user_agent
+        self.ttl_seconds = ttl_seconds
+        self.error_ttl_seconds = error_ttl_seconds
+        self.max_hosts = max_hosts
+        # host -> (parser, expires_at)
+        self._entries: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def robots_url(url: str) -> str:
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc}/robots.txt"
+
+    def get(self, url: str) -> Optional[RobotFileParser]:
+        """The cached parser for the URL's host, or None if it must be fetched"""
+        with self._lock:
+            entry = self._entries.get(host_of(url))
+        if entry is None or time.monotonic() >= entry[1]:
+            return None
+        return entry[0]
+
+    def put(self, url: str, status: Optional[int], text: str = "") -> RobotFileParser:
+        """Store the outcome of fetching robots.txt (status None for a network error)"""
+        parser = RobotFileParser()
+        ttl = self.ttl_seconds
+        if status is not None and 200 <= status < 300:
+            parser.parse(text.splitlines())
+        elif status is not None and 400 <= status < 500:
+            parser.allow_all = True
+        else:
+            parser.disallow_all = True
+            ttl = self.error_ttl_seconds
+        with self._lock:
+            if len(self._entries) >= self.max_hosts:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[host_of(url)] = (parser, time.monotonic() + ttl)
+        return parser
+
+    def allowed(self, parser: RobotFileParser, url: str) -> bool:
+        return parser.can_fetch(self.user_agent, url)
+
+    def crawl_delay(self, parser: RobotFileParser) -> Optional[float]:
+        delay = parser.crawl_delay(self.user_agent)
+        return float(delay) if delay is not None else None
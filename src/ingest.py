@@ -0,0 +1,175 @@
+"""
+Streaming ingest pipeline.
+
+    documents -> dedup/chunk (page batches) -> token-budget batches -> bounded queue -> insert workers
+
+The producer pulls pages lazily from any iterator, so bulk loads never hold the
+whole corpus in memory, and blocks whenever the insert queue is full. Workers
+retry failed objects with exponential backoff and every run returns a report.
+
+    python -m src.ingest pages.jsonl --workers 8
+"""
+import argparse
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List
+
+_STOP = object()
+
+class IngestPipeline:
+    def __init__(self, vector_db, batch_token_budget: int = 20000, max_batch_objects: int = 100,
+                 workers: int = 4, queue_size: int = 8, max_retries: int = 3,
+                 backoff_seconds: float = 0.5, page_batch_size: int = 50) -> None:
+        self.vector_db = vector_db
+        self.batch_token_budget = batch_token_budget
+        self.max_batch_objects = max_batch_objects
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.page_batch_size = page_batch_size
+
+    def _new_report(self) -> Dict:
+        return {
+            "documents": 0, "new": 0, "updated": 0, "skipped": 0,
+            "chunks": 0, "stored": 0, "failed": 0,
+            "batches": 0, "retries": 0, "errors": []
+        }
+
+    def _record_error(self, report: Dict, lock: threading.Lock, message: str):
+        logging.error(message)
+        with lock:
+            if len(report["errors"]) < 20:
+                report["errors"].append(message)
+
+    def _token_batches(self, chunks: List[Dict]) -> Iterator[List[Dict]]:
+        """Group chunks so each embedding/insert request stays within the token budget"""
+        batch, tokens = [], 0
+        for chunk in chunks:
+            chunk_tokens = chunk.get("token_count") or 0
+            if batch and (tokens + chunk_tokens > self.batch_token_budget or len(batch) >= self.max_batch_objects):
+                yield batch
+                batch, tokens = [], 0
+            batch.append(chunk)
+            tokens += chunk_tokens
+        if batch:
+            yield batch
+
+    def _insert_with_retry(self, batch: List[Dict], report: Dict, lock: threading.Lock):
+        pending = batch
+        attempt = 0
+        while True:
+            try:
+                failed = self.vector_db.backend.add_objects(pending) or []
+            except Exception as e:
+                self._record_error(report, lock, f"Batch of {len(pending)} objects failed: {str(e)}")
+                failed = pending
+
+            with lock:
+                report["stored"] += len(pending) - len(failed)
+            if not failed:
+                return
+            if attempt >= self.max_retries:
+                with lock:
+                    report["failed"] += len(failed)
+                self._record_error(report, lock, f"Giving up on {len(failed)} objects after {attempt} retries")
+                return
+
+            attempt += 1
+            with lock:
+                report["retries"] += 1
+            delay = self.backoff_seconds * (2 ** (attempt - 1))
+            time.sleep(delay + random.uniform(0, delay / 2))
+            pending = failed
+
+    def _worker(self, batches: "queue.Queue", report: Dict, lock: threading.Lock):
+        while True:
+            batch = batches.get()
+            try:
+                if batch is _STOP:
+                    return
+                self._insert_with_retry(batch, report, lock)
+            finally:
+                batches.task_done()
+
+    def run(self, documents: Iterable[Dict[str, str]]) -> Dict:
+        report = self._new_report()
+        lock = threading.Lock()
+        batches: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        threads = [
+            threading.Thread(target=self._worker, args=(batches, report, lock), daemon=True)
+            for _ in range(max(1, self.workers))
+        ]
+        for thread in threads:
+            thread.start()
+
+        start = time.perf_counter()
+        iterator = iter(documents)
+        seen_hashes: Dict[str, str] = {}
+        try:
+            while True:
+                pages = list(islice(iterator, self.page_batch_size))
+                if not pages:
+                    break
+                report["documents"] += len(pages)
+                try:
+                    chunks, changed_urls, page_report = self.vector_db.prepare_documents(pages, seen_hashes)
+                    # Old versions must be gone before their replacements are queued
+                    self.vector_db.backend.delete_pages(changed_urls)
+                except Exception as e:
+                    with lock:
+                        report["failed"] += len(pages)
+                    self._record_error(report, lock, f"Could not prepare {len(pages)} documents: {str(e)}")
+                    continue
+
+                for key in ("new", "updated", "skipped"):
+                    report[key] += page_report[key]
+                report["chunks"] += len(chunks)
+                for batch in self._token_batches(chunks):
+                    report["batches"] += 1
+                    batches.put(batch)  # blocks while the workers are behind
+        finally:
+            for _ in threads:
+                batches.put(_STOP)
+            for thread in threads:
+                thread.join()
+
+        elapsed = time.perf_counter() - start
+        report["elapsed_s"] = round(elapsed, 3)
+        report["documents_per_s"] = round(report["documents"] / elapsed, 1) if elapsed else 0.0
+        report["chunks_per_s"] = round(report["stored"] / elapsed, 1) if elapsed else 0.0
+        return report
+
+def read_jsonl(path: str) -> Iterator[Dict[str, str]]:
+    """Lazily read {"url", "title", "content"} documents from a JSON lines file"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def main():
+    from .database import VectorDatabase
+
+    parser = argparse.ArgumentParser(description="Bulk-load crawled pages into the vector store")
+    parser.add_argument("path", help="JSON lines file with url, title and content per line")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-tokens", type=int, default=20000)
+    parser.add_argument("--queue-size", type=int, default=8)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    report = VectorDatabase().ingest(
+        read_jsonl(args.path),
+        workers=args.workers,
+        batch_token_budget=args.batch_tokens,
+        queue_size=args.queue_size
+    )
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
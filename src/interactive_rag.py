@@ -15,33 +15,46 @@ def initialize_system():
     crawler = WebCrawler()
     return db, rag, crawler
 
+def find_documents(query: str, db: VectorDatabase, rag: RAGSystem, crawler: WebCrawler, embedding=None):
+    """Return relevant stored documents, crawling and storing new pages on a miss"""
+    # First, search in existing database
+    print(f"🔍 Searching existing database for: {query}")
+    retrieval = rag.retrieve(query, limit=3, embedding=embedding)  # Get top 3 relevant documents
+    
+    # Check if we have relevant documents
+    if retrieval.is_hit:
+        print("📚 Found relevant information in database!")
+        return retrieval.relevant_documents
+        
+    # If no relevant documents found, perform web search and crawl
+    print("🌐 No relevant information found in database. Searching the web...")
+    documents = crawler.search_and_crawl(query, num_results=5)
+    
+    if documents:
+        # Store the new documents; pages already stored unchanged are skipped
+        print("💾 Storing new documents in database...")
+        db.add_documents(documents)
+        rag.invalidate_sources([doc["url"] for doc in documents if not doc.get("not_modified")])
+    return documents
+
 def search_crawl_and_answer(query: str, db: VectorDatabase, rag: RAGSystem, crawler: WebCrawler):
     try:
-        # First, search in existing database
-        print(f"🔍 Searching existing database for: {query}")
-        existing_docs = db.search(query, limit=100)  # Get top 3 relevant documents
-        
-        # Check if we have relevant documents
-        if existing_docs and len(existing_docs) > 0:
-            print("📚 Found relevant information in database!")
-            # Generate response from existing documents
-            response = rag.generate_response_with_sources(query)
-            return response
-            
-        # If no relevant documents found, perform web search and crawl
-        print("🌐 No relevant information found in database. Searching the web...")
-        documents = crawler.search_and_crawl(query, num_results=5)
+        # Answer repeat and near-duplicate questions from the answer cache
+        embedding = db.embed_query(query)
+        cached = rag.cached_answer(query, embedding)
+        if cached:
+            print("⚡ Found a cached answer!")
+            return cached
+
+        documents = find_documents(query, db, rag, crawler, embedding)
         
         if not documents:
             return {"answer": "Sorry, I couldn't find relevant information for your query.", "sources": []}
         
-        # Store the new documents
-        print("💾 Storing new documents in database...")
-        db.add_documents(documents)
-        
-        # Generate response
+        # Generate response from the documents we already have in hand
         print("🤔 Generating response...")
-        response = rag.generate_response_with_sources(query)
+        response = rag.generate_response_with_sources(query, documents=documents)
+        rag.remember_answer(query, response, embedding)
         
         return response
         
@@ -49,6 +62,37 @@ def search_crawl_and_answer(query: str, db: VectorDatabase, rag: RAGSystem, craw
         logging.error(f"Error in search_crawl_and_answer: {str(e)}")
         return {"answer": f"An error occurred: {str(e)}", "sources": []}
 
+def stream_crawl_and_answer(query: str, db: VectorDatabase, rag: RAGSystem, crawler: WebCrawler):
+    """Like search_crawl_and_answer, but yields (event, data) pairs while the answer is generated"""
+    try:
+        embedding = db.embed_query(query)
+        cached = rag.cached_answer(query, embedding)
+        if cached:
+            print("⚡ Found a cached answer!")
+            yield "sources", cached["sources"]
+            yield "token", cached["answer"]
+            yield "done", cached
+            return
+
+        documents = find_documents(query, db, rag, crawler, embedding)
+        if not documents:
+            answer = "Sorry, I couldn't find relevant information for your query."
+            yield "token", answer
+            yield "done", {"answer": answer, "sources": []}
+            return
+
+        print("🤔 Generating response...")
+        for event, data in rag.stream_response_with_sources(query, documents=documents):
+            if event == "done":
+                rag.remember_answer(query, data, embedding)
+            yield event, data
+
+    except Exception as e:
+        logging.error(f"Error in stream_crawl_and_answer: {str(e)}")
+        answer = f"An error occurred: {str(e)}"
+        yield "token", answer
+        yield "done", {"answer": answer, "sources": []}
+
 def interactive_rag():
     db, rag, crawler = initialize_system()
     
@@ -64,10 +108,21 @@ def interactive_rag():
         
         if choice == "1":
             query = input("\nEnter your question: ")
-            response = search_crawl_and_answer(query, db, rag, crawler)
+            response = {"answer": "", "sources": []}
+            answer_started = False
             
-            print("\n🤖 Answer:")
-            print(response["answer"])
+            # Print the answer as it is generated
+            for event, data in stream_crawl_and_answer(query, db, rag, crawler):
+                if event == "token":
+                    if not answer_started:
+                        print("\n🤖 Answer:")
+                        answer_started = True
+                    print(data, end="", flush=True)
+                elif event == "error":
+                    print(f"\n❌ {data}")
+                elif event == "done":
+                    response = data
+            print()
             
             if response["sources"]:
                 print("\n📚 Sources:")
@@ -0,0 +1,199 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .concurrency import run_blocking
+from .utils import normalize_query
+
+ACTIVE_STATUSES = ("queued", "running")
+FINISHED_STATUSES = ("done", "failed")
+
+class JobQueue:
+    """
+    Persistent crawl-and-ingest job queue.
+    Jobs are stored in SQLite so queued work survives restarts, and are run by
+    a pool of asyncio worker tasks on the API's event loop. Submitting a query
+    that already has a queued or running job returns that job instead of
+    creating a new one, so a burst of identical queries triggers one crawl.
+    """
+
+    def __init__(self, handler: Callable[[Dict], Awaitable[Dict]], path: str = "data/jobs.sqlite3",
+                 workers: int = 2, poll_interval: float = 1.0, retention_seconds: float = 7 * 86400) -> None:
+        self.handler = handler
+        self.path = path
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    key TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    num_results INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_key_status ON jobs (key, status)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at)")
+
+    def _row_to_job(self, row: Optional[sqlite3.Row]) -> Optional[Dict]:
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def submit(self, query: str, num_results: int = 5) -> Tuple[Dict, bool]:
+        """Queue a crawl for the query; returns (job, created) with created=False for a deduplicated job"""
+        key = normalize_query(query)
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so other processes sharing
+            # the file cannot slip in a duplicate between the check and the insert
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE key = ? AND status IN (?, ?) ORDER BY created_at LIMIT 1",
+                    (key, *ACTIVE_STATUSES)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute("COMMIT")
+                    return self._row_to_job(row), False
+
+                job_id = uuid.uuid4().hex
+                self._conn.execute(
+                    "INSERT INTO jobs (id, key, query, num_results, status, created_at) VALUES (?, ?, ?, ?, 'queued', ?)",
+                    (job_id, key, query, num_results, time.time())
+                )
+                row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self._row_to_job(row), True
+
+    async def asubmit(self, query: str, num_results: int = 5) -> Tuple[Dict, bool]:
+        job, created = await run_blocking(self.submit, query, num_results)
+        if created and self._wakeup is not None:
+            self._wakeup.set()
+        return job, created
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row)
+
+    def list_jobs(self, status: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        with self._lock:
+            if status:
+                rows = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?", (status, limit)
+                ).fetchall()
+            else:
+                rows = self._conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def _claim_next(self) -> Optional[Dict]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?", (time.time(), row["id"])
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self._row_to_job(row)
+
+    def _finish(self, job_id: str, result: Optional[Dict] = None, error: Optional[str] = None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                ("failed" if error else "done", json.dumps(result) if result is not None else None,
+                 error, time.time(), job_id)
+            )
+
+    def _recover(self):
+        """Requeue jobs interrupted by a restart and drop old finished ones"""
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'")
+            self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (*FINISHED_STATUSES, time.time() - self.retention_seconds)
+            )
+
+    async def _worker(self):
+        while True:
+            job = await run_blocking(self._claim_next)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            logging.info(f"Running job {job['id']} for: {job['query']}")
+            try:
+                result = await self.handler(job)
+                await run_blocking(self._finish, job["id"], result)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Job {job['id']} failed: {str(e)}")
+                await run_blocking(self._finish, job["id"], None, str(e))
+
+    @property
+    def is_running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    async def start(self):
+        if self._tasks:
+            return
+        await run_blocking(self._recover)
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(max(1, self.workers))]
+        logging.info(f"Started {len(self._tasks)} job workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def wait(self, job_id: str, timeout: float = 60, interval: float = 0.25) -> Optional[Dict]:
+        """Wait until the job has finished (or the timeout expires) and return it"""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = await run_blocking(self.get, job_id)
+            if job is None or job["status"] in FINISHED_STATUSES or time.monotonic() >= deadline:
+                return job
+            await asyncio.sleep(interval)
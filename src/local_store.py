@@ -0,0 +1,288 @@
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .embeddings import HashingEmbedder
+from .keyword_index import BM25Index
+from .storage import StorageBackend
+
+VECTORS_FILE = "vectors.npy"
+OBJECTS_FILE = "objects.jsonl"
+
+class LocalVectorStore(StorageBackend):
+    """
+    In-process vector store.
+    Embeddings live in one contiguous float32 matrix (memory-mapped from disk
+    when a path is given) with unit-normalized rows, so a top-k search is a
+    single matrix-vector product. Object properties are kept in memory and
+    appended to a JSON lines file alongside the matrix, and an in-memory
+    BM25 index over title and content serves keyword searches.
+    """
+
+    def __init__(self, path: Optional[str] = None, embed_fn: Optional[Callable] = None,
+                 initial_capacity: int = 1024) -> None:
+        self.path = path
+        self.embed_fn = embed_fn or HashingEmbedder()
+        self.initial_capacity = initial_capacity
+        self._objects: List[Dict] = []
+        self._index: Dict[str, int] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._keywords = BM25Index()
+        # Ids in ascending order for cursor pagination, rebuilt lazily after writes
+        self._sorted_ids: Optional[List[str]] = None
+        self._lock = threading.RLock()
+
+    @property
+    def default_max_distance(self) -> float:
+        """The relevance threshold that suits the embedding function"""
+        return getattr(self.embed_fn, "default_max_distance", StorageBackend.default_max_distance)
+
+    @property
+    def count(self) -> int:
+        return len(self._objects)
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def setup(self):
+        if not self.path:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        if not os.path.exists(self._file(VECTORS_FILE)):
+            return
+
+        with self._lock:
+            self._matrix = np.load(self._file(VECTORS_FILE), mmap_mode="r+")
+            self._objects = []
+            if os.path.exists(self._file(OBJECTS_FILE)):
+                with open(self._file(OBJECTS_FILE), encoding="utf-8") as f:
+                    self._objects = [json.loads(line) for line in f if line.strip()]
+            # Rows past the last complete object belong to an interrupted write
+            self._objects = self._objects[:len(self._matrix)]
+            self._index = {obj["id"]: i for i, obj in enumerate(self._objects)}
+            self._sorted_ids = None
+            self._rebuild_keywords()
+        logging.info(f"Loaded {self.count} objects from local vector store")
+
+    def _keyword_text(self, obj: Dict) -> str:
+        return f"{obj.get('title', '')} {obj.get('content', '')}"
+
+    def _rebuild_keywords(self):
+        self._keywords.clear()
+        for obj in self._objects:
+            self._keywords.add(obj["id"], self._keyword_text(obj))
+
+    def _allocate(self, capacity: int, dim: int) -> np.ndarray:
+        if not self.path:
+            return np.zeros((capacity, dim), dtype=np.float32)
+        tmp_path = self._file(VECTORS_FILE + ".tmp")
+        matrix = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(capacity, dim))
+        return matrix
+
+    def _ensure_capacity(self, needed: int, dim: int):
+        if self._matrix is not None:
+            if self._matrix.shape[1] != dim:
+                raise ValueError(f"Embedding dimension {dim} does not match store dimension {self._matrix.shape[1]}")
+            if needed <= self._matrix.shape[0]:
+                return
+
+        capacity = max(self.initial_capacity, needed)
+        if self._matrix is not None:
+            capacity = max(capacity, self._matrix.shape[0] * 2)
+        matrix = self._allocate(capacity, dim)
+        if self._matrix is not None and self.count:
+            matrix[:self.count] = self._matrix[:self.count]
+
+        if self.path:
+            matrix.flush()
+            del matrix
+            self._matrix = None
+            os.replace(self._file(VECTORS_FILE + ".tmp"), self._file(VECTORS_FILE))
+            matrix = np.load(self._file(VECTORS_FILE), mmap_mode="r+")
+        self._matrix = matrix
+
+    def _normalize(self, vectors) -> np.ndarray:
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def embed_query(self, query: str) -> Optional[List[float]]:
+        return self._normalize(self.embed_fn([query]))[0].tolist()
+
+    def embed_queries(self, queries: List[str]) -> List[Optional[List[float]]]:
+        return self._normalize(self.embed_fn(queries)).tolist() if queries else []
+
+    def _rewrite_objects(self):
+        if self.path:
+            tmp_path = self._file(OBJECTS_FILE + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for obj in self._objects:
+                    f.write(json.dumps(obj) + "\n")
+            os.replace(tmp_path, self._file(OBJECTS_FILE))
+
+    def add_objects(self, objects: List[Dict]) -> List[Dict]:
+        if not objects:
+            return []
+        # An id repeated within the batch is a single upsert, the last version wins
+        batch = {}
+        for obj in objects:
+            obj = {**obj, "id": obj.get("id") or str(uuid.uuid4())}
+            batch[obj["id"]] = obj
+        objects = list(batch.values())
+        vectors = self._normalize(self.embed_fn([obj.get("content", "") for obj in objects]))
+        now = time.time()
+
+        with self._lock:
+            appended = []
+            replaced = False
+            for obj, vector in zip(objects, vectors):
+                obj.setdefault("ingested_at", now)
+                row = self._index.get(obj["id"])
+                if row is not None:
+                    # Upsert: overwrite the existing row in place
+                    self._matrix[row] = vector
+                    self._objects[row] = obj
+                    self._keywords.add(obj["id"], self._keyword_text(obj))
+                    replaced = True
+                else:
+                    appended.append((obj, vector))
+
+            if appended:
+                self._sorted_ids = None
+                start = self.count
+                self._ensure_capacity(start + len(appended), vectors.shape[1])
+                self._matrix[start:start + len(appended)] = np.stack([vector for _, vector in appended])
+                for offset, (obj, _) in enumerate(appended):
+                    self._index[obj["id"]] = start + offset
+                    self._objects.append(obj)
+                    self._keywords.add(obj["id"], self._keyword_text(obj))
+
+            if self.path:
+                self._matrix.flush()
+                if replaced:
+                    self._rewrite_objects()
+                else:
+                    with open(self._file(OBJECTS_FILE), "a", encoding="utf-8") as f:
+                        for obj, _ in appended:
+                            f.write(json.dumps(obj) + "\n")
+        return []
+
+    def _compact(self, keep: List[int]) -> int:
+        """Keep only the given rows, preserving their order; returns the number of rows dropped"""
+        dropped = self.count - len(keep)
+        if not dropped:
+            return 0
+        if keep:
+            self._matrix[:len(keep)] = self._matrix[np.asarray(keep)]
+        kept = set(keep)
+        for i, obj in enumerate(self._objects):
+            if i not in kept:
+                self._keywords.remove(obj["id"])
+        self._objects = [self._objects[i] for i in keep]
+        self._index = {obj["id"]: i for i, obj in enumerate(self._objects)}
+        self._sorted_ids = None
+        if self.path:
+            self._matrix.flush()
+            self._rewrite_objects()
+        return dropped
+
+    def get_page_index(self, urls: List[str], content_hashes: List[str],
+                       simhash_bands: Sequence[str] = ()) -> List[Dict]:
+        urls, content_hashes, simhash_bands = set(urls), set(content_hashes), set(simhash_bands)
+        with self._lock:
+            entries = {
+                (obj.get("parent_url"), obj.get("content_hash"), obj.get("page_simhash"))
+                for obj in self._objects
+                if obj.get("parent_url") in urls or obj.get("content_hash") in content_hashes
+                or not simhash_bands.isdisjoint(obj.get("simhash_bands") or ())
+            }
+        return [
+            {"parent_url": url, "content_hash": page_hash, "page_simhash": page_simhash}
+            for url, page_hash, page_simhash in entries
+        ]
+
+    def delete_pages(self, urls: List[str]) -> int:
+        urls = set(urls)
+        with self._lock:
+            return self._compact([i for i, obj in enumerate(self._objects) if obj.get("parent_url") not in urls])
+
+    def delete_objects(self, ids: List[str]) -> int:
+        with self._lock:
+            drop = {self._index[doc_id] for doc_id in ids if doc_id in self._index}
+            if not drop:
+                return 0
+            return self._compact([i for i in range(self.count) if i not in drop])
+
+    def search(self, query: str, limit: int = 5, vector: Optional[List[float]] = None) -> List[Dict]:
+        return self.search_many([query], limit, [vector])[0]
+
+    def search_many(self, queries: List[str], limit: int = 5,
+                    vectors: Optional[List[Optional[List[float]]]] = None) -> List[List[Dict]]:
+        vectors = list(vectors or [None] * len(queries))
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            for i, vector in zip(missing, self.embed_queries([queries[i] for i in missing])):
+                vectors[i] = vector
+        if not queries:
+            return []
+        query_matrix = self._normalize(vectors)
+
+        with self._lock:
+            count = self.count
+            if not count or limit <= 0:
+                return [[] for _ in queries]
+            # One matrix-matrix product scores every query against every row
+            scores = self._matrix[:count] @ query_matrix.T
+            objects = self._objects
+
+        k = min(limit, count)
+        results = []
+        for column in scores.T:
+            top = np.argpartition(-column, k - 1)[:k]
+            top = top[np.argsort(-column[top])]
+            results.append([{**objects[i], "distance": float(1.0 - column[i])} for i in top])
+        return results
+
+    def keyword_search(self, query: str, limit: int = 5, vector: Optional[List[float]] = None) -> List[Dict]:
+        query_vector = self._normalize(vector)[0] if vector is not None else None
+        with self._lock:
+            hits = []
+            for doc_id, score in self._keywords.search(query, limit):
+                row = self._index[doc_id]
+                hit = {**self._objects[row], "bm25_score": score, "distance": None}
+                if query_vector is not None:
+                    hit["distance"] = float(1.0 - self._matrix[row] @ query_vector)
+                hits.append(hit)
+        return hits
+
+    def list_objects(self, properties: List[str], after: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        with self._lock:
+            if self._sorted_ids is None:
+                self._sorted_ids = sorted(self._index)
+            start = bisect.bisect_right(self._sorted_ids, after) if after else 0
+            page = []
+            for doc_id in self._sorted_ids[start:start + limit]:
+                obj = self._objects[self._index[doc_id]]
+                page.append({
+                    "id": doc_id,
+                    "ingested_at": obj.get("ingested_at"),
+                    **{name: obj.get(name) for name in properties}
+                })
+            return page
+
+    def clear(self):
+        with self._lock:
+            self._objects = []
+            self._index = {}
+            self._sorted_ids = None
+            self._keywords.clear()
+            if self.path:
+                open(self._file(OBJECTS_FILE), "w").close()
@@ -1,99 +1,695 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Match
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+import asyncio
+import json
 import os
+import threading
+import time
 from dotenv import load_dotenv
 import logging
 
+from . import metrics
 from .crawler import WebCrawler
-from .database import VectorDatabase
-from .rag import RAGSystem
+from .database import DOCUMENT_PROPERTIES, MAX_LISTING_PAGE, VectorDatabase
+from .rag import BATCH_CONCURRENCY, RAGSystem
+from .concurrency import SingleFlight, run_blocking
+from .jobs import JobQueue
+from .utils import normalize_query
 
 load_dotenv()
 logging.basicConfig(level=logging.INFO)
 
 app = FastAPI(title="RAG API", description="API for RAG-based search and answers")
 
-# Initialize components
-vector_db = VectorDatabase()
-rag_system = RAGSystem(vector_db)
-crawler = WebCrawler()
+# Seconds a readiness probe waits on each dependency
+HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", "2"))
+# Queries accepted by a single /search/batch request
+MAX_BATCH_QUERIES = int(os.getenv("MAX_BATCH_QUERIES", "500"))
+# Crawled content older than this many days is expired in the background (0 keeps everything)
+DOCUMENT_TTL_DAYS = float(os.getenv("DOCUMENT_TTL_DAYS", "0"))
+# Seconds between retention sweeps
+RETENTION_INTERVAL = float(os.getenv("RETENTION_INTERVAL", "3600"))
+
+class Components:
+    """
+    Lazily built, shared API components.
+    Nothing connects to Weaviate or loads a tokenizer at import time; each
+    component is built on first use (or by the startup warm-up) and a failed
+    build is retried on the next request instead of crashing the worker.
+    """
+
+    def __init__(self, factories: Dict[str, Callable[[], Any]]) -> None:
+        self._factories = factories
+        self._instances: Dict[str, Any] = {}
+        self._errors: Dict[str, str] = {}
+        self._locks = {name: threading.Lock() for name in factories}
+
+    def get(self, name: str) -> Any:
+        if name in self._instances:
+            return self._instances[name]
+        with self._locks[name]:
+            if name not in self._instances:
+                try:
+                    self._instances[name] = self._factories[name]()
+                    self._errors.pop(name, None)
+                except Exception as e:
+                    self._errors[name] = str(e)
+                    raise
+            return self._instances[name]
+
+    async def aget(self, name: str) -> Any:
+        if name in self._instances:
+            return self._instances[name]
+        # Building can block on the network, keep it off the event loop
+        return await run_blocking(self.get, name)
+
+    def set(self, name: str, instance: Any):
+        """Use a prebuilt instance instead of the factory, e.g. to run the API against local stand-ins"""
+        self._instances[name] = instance
+        self._errors.pop(name, None)
+
+    def peek(self, name: str) -> Optional[Any]:
+        """The component if it has been built, without building it"""
+        return self._instances.get(name)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            name: "ready" if name in self._instances else self._errors.get(name, "not initialized")
+            for name in self._factories
+        }
+
+async def crawl_and_ingest(job: dict) -> dict:
+    """Background job: crawl the web for a query and store the new pages"""
+    crawler = await components.aget("crawler")
+    documents = await crawler.search_and_crawl_async(job["query"], num_results=job["num_results"])
+
+    # Ingest every page: unchanged ones already in the store are skipped by the
+    # page index, while pages deleted or expired since the last crawl (which the
+    # fetch cache still reports as not modified) are stored again
+    report = {}
+    if documents:
+        vector_db = await components.aget("vector_db")
+        rag_system = await components.aget("rag_system")
+        report = await run_blocking(vector_db.add_documents, documents)
+        rag_system.invalidate_sources([doc["url"] for doc in documents if not doc.get("not_modified")])
+    return {
+        "crawled": len(documents),
+        "ingest": {key: report.get(key, 0) for key in ("new", "updated", "skipped", "stored", "failed")}
+    }
+
+components = Components({
+    "vector_db": VectorDatabase,
+    "rag_system": lambda: RAGSystem(components.get("vector_db")),
+    "crawler": WebCrawler,
+    "job_queue": lambda: JobQueue(
+        crawl_and_ingest,
+        path=os.getenv("JOBS_DB_PATH", "data/jobs.sqlite3"),
+        workers=int(os.getenv("JOB_WORKERS", "2"))
+    ),
+})
+
+# Coalesces concurrent identical /search calls
+search_flight = SingleFlight()
 
 class SearchRequest(BaseModel):
     query: str
     num_results: Optional[int] = 5
+    wait: Optional[bool] = False  # Wait for the crawl on a miss instead of answering right away
+    include_timings: Optional[bool] = False  # Return the per-stage latency breakdown
+
+class BatchSearchRequest(BaseModel):
+    queries: List[str]
+    num_results: Optional[int] = 5
+    wait: Optional[bool] = False  # Wait for the crawls of cache misses instead of answering right away
+    max_concurrency: Optional[int] = None  # Completions in flight; RAG_BATCH_CONCURRENCY by default
+
+class DeleteDocumentsRequest(BaseModel):
+    # Chunks matching any of the criteria are deleted
+    urls: Optional[List[str]] = None
+    domains: Optional[List[str]] = None
+    older_than_days: Optional[float] = None
+    query: Optional[str] = None
+    query_limit: Optional[int] = 10  # Search hits deleted for query
 
 class SearchResponse(BaseModel):
     answer: str
     sources: List[dict]
     from_cache: bool = False  # To indicate if response came from database
+    cache_layer: Optional[str] = None  # answer_exact, answer_semantic or vector_store
+    status: str = "complete"  # "pending" while a background crawl for the query is running
+    job_id: Optional[str] = None
+    timings: Optional[Dict[str, float]] = None  # Seconds per stage, when include_timings is set
+
+async def _cached_answer(query: str) -> Tuple[Optional[dict], Optional[List[float]]]:
+    """Check the answer cache; returns (cached response, query embedding)"""
+    rag_system = await components.aget("rag_system")
+    # Repeat questions are answered straight from the answer cache
+    cached = rag_system.cached_answer(query)
+    metrics.record_cache_lookup("answer_exact", cached is not None)
+    if cached:
+        logging.info("Serving answer from cache")
+        return cached, None
+
+    # One embedding serves the semantic cache and the vector lookup
+    embedding = await run_blocking(rag_system.vector_db.embed_query, query)
+    cached = rag_system.cached_answer(query, embedding)
+    if embedding is not None:
+        metrics.record_cache_lookup("answer_semantic", cached is not None)
+    if cached:
+        logging.info("Serving answer for a similar query from cache")
+    return cached, embedding
+
+async def _find_documents(query: str, num_results: int, embedding: Optional[List[float]],
+                          wait: bool = False) -> Tuple[List[dict], bool, Optional[dict]]:
+    """
+    Return (documents, found_in_store, crawl job). On a miss a background crawl
+    is queued and the closest stored documents are returned right away, unless
+    wait is set, in which case the crawl is awaited first and only documents
+    within the relevance threshold are returned (none if the crawl failed or
+    found nothing relevant).
+    """
+    rag_system = await components.aget("rag_system")
+    # Check database - this single lookup also feeds the answer
+    logging.info(f"Searching database for: {query}")
+    retrieval = await rag_system.aretrieve(query, limit=num_results, embedding=embedding)
+    metrics.record_cache_lookup("vector_store", retrieval.is_hit)
+
+    if retrieval.is_hit:
+        logging.info("Found relevant documents in database")
+        return retrieval.relevant_documents, True, None
+
+    # If no relevant docs found, crawl the web in the background
+    job_queue = await components.aget("job_queue")
+    job, created = await job_queue.asubmit(query, num_results)
+    logging.info(f"No relevant documents found in database, {'queued' if created else 'joined'} crawl job {job['id']}")
+    if not wait:
+        return retrieval.documents, False, job
+
+    job = await job_queue.wait(job["id"])
+    if job and job["status"] == "done":
+        retrieval = await rag_system.aretrieve(query, limit=num_results, embedding=embedding)
+    return retrieval.relevant_documents, False, job
+
+def _job_fields(job: Optional[dict]) -> dict:
+    if job is None or job["status"] in ("done", "failed"):
+        return {"status": "complete", "job_id": job["id"] if job else None}
+    return {"status": "pending", "job_id": job["id"]}
+
+async def _search(query: str, num_results: int, wait: bool) -> dict:
+    with metrics.trace() as request_trace:
+        response = await _answer(query, num_results, wait)
+    return {**response, "timings": request_trace.as_dict()}
+
+async def _answer(query: str, num_results: int, wait: bool) -> dict:
+    cached, embedding = await _cached_answer(query)
+    if cached:
+        return {**cached, "from_cache": True}
+
+    documents, from_store, job = await _find_documents(query, num_results, embedding, wait)
+    job_fields = _job_fields(job)
+    
+    if not documents:
+        if job_fields["status"] == "pending":
+            return {
+                "answer": "Searching the web for this question, please check back shortly.",
+                "sources": [],
+                **job_fields
+            }
+        raise HTTPException(status_code=404, detail="No relevant documents found")
+    
+    # Generate response from the documents we already have in hand
+    rag_system = await components.aget("rag_system")
+    response = await rag_system.agenerate_response_with_sources(query, documents=documents)
+    # Only complete answers come from documents within the relevance threshold
+    if job_fields["status"] == "complete":
+        rag_system.remember_answer(query, response, embedding)
+    
+    return {
+        "answer": response["answer"],
+        "sources": response["sources"],
+        "from_cache": from_store,
+        "cache_layer": "vector_store" if from_store else None,
+        **job_fields
+    }
 
 @app.post("/search", response_model=SearchResponse)
 async def search_and_answer(request: SearchRequest):
     """
     Search, crawl, and answer questions using RAG
-    First checks database, then crawls if needed
+    First checks database; on a miss a background crawl is queued and the
+    response is marked pending with the crawl's job id.
+    Identical queries arriving together share one lookup and one completion.
     """
     try:
-        # First check database
-        logging.info(f"Searching database for: {request.query}")
-        existing_docs = vector_db.search(request.query, limit=request.num_results)
-        
-        if existing_docs and len(existing_docs) > 0:
-            logging.info("Found relevant documents in database")
-            response = rag_system.generate_response_with_sources(request.query)
-            return {
-                "answer": response["answer"],
-                "sources": response["sources"],
-                "from_cache": True
+        key = (normalize_query(request.query), request.num_results, bool(request.wait))
+        response = await search_flight.do(
+            key, lambda: _search(request.query, request.num_results, request.wait)
+        )
+        if not request.include_timings:
+            response = {**response, "timings": None}
+        return response
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error in search_and_answer: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def _answer_batch(queries: List[str], num_results: int, wait: bool,
+                        max_concurrency: Optional[int] = None) -> AsyncIterator[Tuple[str, dict]]:
+    """
+    Answer distinct queries together, yielding (query, response) as each is
+    ready: cache hits first, then completions as they finish. The queries
+    share one embedding call and one batched vector lookup, and misses queue
+    one crawl each. A query that cannot be answered yields {"error": ...}.
+    """
+    rag_system = await components.aget("rag_system")
+    remaining = []
+    for query in queries:
+        cached = rag_system.cached_answer(query)
+        metrics.record_cache_lookup("answer_exact", cached is not None)
+        if cached:
+            yield query, {**cached, "from_cache": True}
+        else:
+            remaining.append(query)
+    if not remaining:
+        return
+
+    embeddings = await run_blocking(rag_system.vector_db.embed_queries, remaining)
+    queries, vectors = [], []
+    for query, embedding in zip(remaining, embeddings):
+        cached = rag_system.cached_answer(query, embedding)
+        if embedding is not None:
+            metrics.record_cache_lookup("answer_semantic", cached is not None)
+        if cached:
+            yield query, {**cached, "from_cache": True}
+        else:
+            queries.append(query)
+            vectors.append(embedding)
+    if not queries:
+        return
+
+    retrievals = await rag_system.aretrieve_many(queries, limit=num_results, embeddings=vectors)
+    jobs: Dict[int, dict] = {}
+    job_queue = await components.aget("job_queue")
+    for i, retrieval in enumerate(retrievals):
+        metrics.record_cache_lookup("vector_store", retrieval.is_hit)
+        if not retrieval.is_hit:
+            jobs[i], _ = await job_queue.asubmit(queries[i], num_results)
+    if jobs:
+        logging.info(f"Batch of {len(queries)} queries queued {len(jobs)} crawl jobs")
+
+    if wait and jobs:
+        finished = await asyncio.gather(*(job_queue.wait(job["id"]) for job in jobs.values()))
+        jobs = {i: job or jobs[i] for i, job in zip(jobs, finished)}
+        crawled = [i for i, job in jobs.items() if job["status"] == "done"]
+        if crawled:
+            refreshed = await rag_system.aretrieve_many(
+                [queries[i] for i in crawled], limit=num_results, embeddings=[vectors[i] for i in crawled]
+            )
+            for i, retrieval in zip(crawled, refreshed):
+                retrievals[i] = retrieval
+
+    requests, answered = [], []
+    for i, retrieval in enumerate(retrievals):
+        # Without waiting, a miss is answered from the closest documents while
+        # its crawl runs; such answers are pending and never cached
+        documents = retrieval.documents if i in jobs and not wait else retrieval.relevant_documents
+        job_fields = _job_fields(jobs.get(i))
+        if documents:
+            requests.append((queries[i], documents))
+            answered.append(i)
+        elif job_fields["status"] == "pending":
+            yield queries[i], {
+                "answer": "Searching the web for this question, please check back shortly.",
+                "sources": [],
+                **job_fields
             }
-        
-        # If no relevant docs found, crawl the web
-        logging.info("No relevant documents found in database, crawling web...")
-        documents = crawler.search_and_crawl(request.query, num_results=request.num_results)
-        
-        if not documents:
-            raise HTTPException(status_code=404, detail="No relevant documents found")
-        
-        # Store new documents
-        vector_db.add_documents(documents)
-        
-        # Generate response
-        response = rag_system.generate_response_with_sources(request.query)
-        
-        return {
+        else:
+            yield queries[i], {"error": "No relevant documents found"}
+
+    async for position, response in rag_system.agenerate_batch(requests, max_concurrency or BATCH_CONCURRENCY):
+        i = answered[position]
+        job_fields = _job_fields(jobs.get(i))
+        if job_fields["status"] == "complete":
+            rag_system.remember_answer(queries[i], response, vectors[i])
+        yield queries[i], {
             "answer": response["answer"],
             "sources": response["sources"],
-            "from_cache": False
+            "from_cache": i not in jobs,
+            "cache_layer": "vector_store" if i not in jobs else None,
+            **job_fields
         }
+
+@app.post("/search/batch")
+async def search_batch(request: BatchSearchRequest):
+    """
+    Answer many queries in one request, streamed back as newline-delimited
+    JSON with one {"index", "query", ...} line per query as it finishes.
+    Repeated queries in the batch are answered once.
+    """
+    if not request.queries:
+        raise HTTPException(status_code=400, detail="No queries given")
+    if len(request.queries) > MAX_BATCH_QUERIES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_QUERIES} queries per batch")
+
+    positions: Dict[str, List[int]] = {}
+    distinct = []
+    for i, query in enumerate(request.queries):
+        key = normalize_query(query)
+        if key not in positions:
+            positions[key] = []
+            distinct.append(query)
+        positions[key].append(i)
+
+    async def lines():
+        try:
+            async for query, response in _answer_batch(
+                distinct, request.num_results, bool(request.wait), request.max_concurrency
+            ):
+                for i in positions[normalize_query(query)]:
+                    yield json.dumps({"index": i, "query": request.queries[i], **response}) + "\n"
+        except Exception as e:
+            logging.error(f"Error in search_batch: {str(e)}")
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/search/stream")
+async def search_and_stream(request: SearchRequest):
+    """
+    Same as /search but streams Server-Sent Events:
+    the sources first, then answer tokens as they are generated, then done
+    """
+    async def events():
+        with metrics.trace() as request_trace:
+            try:
+                cached, embedding = await _cached_answer(request.query)
+                if cached:
+                    yield _sse("sources", cached["sources"])
+                    yield _sse("token", cached["answer"])
+                    yield _sse("done", {**cached, "from_cache": True, **_timings(request, request_trace)})
+                    return
+
+                documents, from_store, job = await _find_documents(
+                    request.query, request.num_results, embedding, request.wait
+                )
+                job_fields = _job_fields(job)
+                if job_fields["status"] == "pending":
+                    yield _sse("pending", job_fields)
+                if not documents:
+                    if job_fields["status"] == "complete":
+                        yield _sse("error", "No relevant documents found")
+                    return
+
+                rag_system = await components.aget("rag_system")
+                async for event, data in rag_system.astream_response_with_sources(request.query, documents=documents):
+                    if event == "done":
+                        if job_fields["status"] == "complete":
+                            rag_system.remember_answer(request.query, data, embedding)
+                        data = {
+                            **data,
+                            "from_cache": from_store,
+                            "cache_layer": "vector_store" if from_store else None,
+                            **job_fields,
+                            **_timings(request, request_trace)
+                        }
+                    yield _sse(event, data)
+            except Exception as e:
+                logging.error(f"Error in search_and_stream: {str(e)}")
+                yield _sse("error", str(e))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _timings(request: SearchRequest, request_trace: metrics.Trace) -> dict:
+    return {"timings": request_trace.as_dict()} if request.include_timings else {}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Status and result of a background crawl job
+    """
+    job_queue = await components.aget("job_queue")
+    job = await run_blocking(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/jobs")
+async def list_jobs(status: Optional[str] = None, limit: int = 50):
+    """
+    Recent background crawl jobs, optionally filtered by status
+    """
+    job_queue = await components.aget("job_queue")
+    return {"jobs": await run_blocking(job_queue.list_jobs, status, limit)}
+
+@app.get("/stats")
+async def get_stats():
+    """
+    Counters showing how much work request coalescing and the token cache have
+    saved, and how many hosts the crawler is backing off from
+    """
+    stats = {"search_coalescing": search_flight.stats()}
+    rag_system = components.peek("rag_system")
+    if rag_system is not None:
+        stats["token_cache"] = rag_system.token_cache.stats()
+    crawler = components.peek("crawler")
+    if crawler is not None:
+        stats["crawl_hosts"] = crawler.scheduler.stats()
+    return stats
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Stage latencies, cache hit/miss counts, tokens and bytes fetched in the
+    Prometheus text format
+    """
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+def _endpoint(request: Request) -> str:
+    """Route template for the request, so /jobs/{job_id} is one series rather than one per id"""
+    for route in app.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        metrics.REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            endpoint=_endpoint(request), method=request.method, status=status
+        )
+
+@app.get("/health/live")
+async def liveness():
+    """
+    The process is up and serving requests
+    """
+    return {"status": "alive"}
+
+async def _check(name: str, probe: Callable[[], bool]) -> Tuple[str, bool, str]:
+    try:
+        ok = await asyncio.wait_for(run_blocking(probe), timeout=HEALTH_CHECK_TIMEOUT)
+        return name, bool(ok), "ok" if ok else "not ready"
+    except asyncio.TimeoutError:
+        return name, False, f"no answer within {HEALTH_CHECK_TIMEOUT}s"
     except Exception as e:
-        logging.error(f"Error in search_and_answer: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        return name, False, str(e)
+
+@app.get("/health/ready")
+async def readiness():
+    """
+    Whether the dependencies needed to answer searches are up;
+    503 until they are
+    """
+    checks = {}
+    vector_db = components.peek("vector_db")
+    if vector_db is not None:
+        name, ok, detail = await _check("vector_store", vector_db.check_connection)
+        checks[name] = {"ok": ok, "detail": detail}
+    job_queue = components.peek("job_queue")
+    workers_running = job_queue is not None and job_queue.is_running
+    checks["job_workers"] = {"ok": workers_running, "detail": "running" if workers_running else "stopped"}
+    has_key = bool(os.getenv("OPENAI_API_KEY"))
+    checks["openai"] = {"ok": has_key, "detail": "configured" if has_key else "OPENAI_API_KEY not set"}
+    for name, state in components.status().items():
+        checks.setdefault(name, {"ok": state == "ready", "detail": state})
+
+    ready = all(check["ok"] for check in checks.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not ready", "checks": checks}
+    )
+
+async def _warm_up():
+    """Build the remaining components in the background so the first search is fast"""
+    for name in ("vector_db", "rag_system", "crawler"):
+        try:
+            await components.aget(name)
+        except Exception as e:
+            logging.error(f"Could not initialize {name}, will retry on demand: {str(e)}")
+
+async def _delete_documents(**criteria) -> dict:
+    """
+    Run a selective delete, then drop the cached answers citing the deleted
+    pages and their fetch cache entries, so the next crawl stores them again
+    """
+    vector_db = await components.aget("vector_db")
+    report = await run_blocking(vector_db.delete_documents, **criteria)
+    if report["urls"]:
+        rag_system = components.peek("rag_system")
+        if rag_system is not None:
+            rag_system.invalidate_sources(report["urls"])
+        crawler = await components.aget("crawler")
+        await run_blocking(crawler.fetch_cache.delete, report["urls"])
+    return report
+
+async def _expire_stale_documents():
+    """Retention policy: periodically delete content ingested more than DOCUMENT_TTL_DAYS ago"""
+    while True:
+        try:
+            report = await _delete_documents(older_than=time.time() - DOCUMENT_TTL_DAYS * 86400)
+            if report["deleted"]:
+                logging.info(f"Retention sweep expired {report['deleted']} objects")
+        except Exception as e:
+            logging.error(f"Retention sweep failed: {str(e)}")
+        await asyncio.sleep(RETENTION_INTERVAL)
+
+_background_tasks: List[asyncio.Task] = []
+
+@app.on_event("startup")
+async def startup():
+    job_queue = await components.aget("job_queue")
+    await job_queue.start()
+    # Held here so the tasks are not garbage-collected mid-run, and awaited on shutdown
+    _background_tasks.append(asyncio.ensure_future(_warm_up()))
+    if DOCUMENT_TTL_DAYS > 0:
+        _background_tasks.append(asyncio.ensure_future(_expire_stale_documents()))
+
+@app.on_event("shutdown")
+async def shutdown():
+    for task in _background_tasks:
+        task.cancel()
+    results = await asyncio.gather(*_background_tasks, return_exceptions=True)
+    for task, result in zip(_background_tasks, results):
+        if isinstance(result, Exception):
+            logging.error(f"Background task {task.get_coro().__name__} failed: {str(result)}")
+    _background_tasks.clear()
+    job_queue = components.peek("job_queue")
+    if job_queue is not None:
+        await job_queue.stop()
+    crawler = components.peek("crawler")
+    if crawler is not None:
+        await crawler.aclose()
+
+def _document_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Parse a comma-separated fields query parameter"""
+    if not fields:
+        return None
+    return [name.strip() for name in fields.split(",") if name.strip()]
 
 @app.get("/documents")
-async def get_stored_documents():
+async def get_stored_documents(cursor: Optional[str] = None,
+                               limit: int = Query(100, ge=1, le=MAX_LISTING_PAGE),
+                               fields: Optional[str] = None):
     """
-    Get all stored documents from the vector database
+    Page through stored documents in id order.
+    Returns light projections (title, url, chunk position, token count and
+    ingest time) unless fields lists other properties, e.g. fields=url,content.
+    Pass next_cursor as cursor to get the following page.
     """
+    vector_db = await components.aget("vector_db")
     try:
-        documents = vector_db.get_all_documents(limit=100)
-        if not documents:
-            return {"documents": []}
-        return {"documents": documents}
+        return await run_blocking(vector_db.list_documents, cursor, limit, _document_fields(fields))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/documents/export")
+async def export_documents(fields: Optional[str] = None):
+    """
+    Stream every stored document as newline-delimited JSON, all properties by
+    default. The store is read one page at a time, so memory use stays flat
+    however large the collection is.
+    """
+    vector_db = await components.aget("vector_db")
+    properties = _document_fields(fields) or DOCUMENT_PROPERTIES
+    try:
+        # Validate the fields and surface store errors before the response starts
+        first_page = await run_blocking(vector_db.list_documents, None, MAX_LISTING_PAGE, properties)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def lines():
+        page = first_page
+        while True:
+            yield "".join(json.dumps(doc) + "\n" for doc in page["documents"])
+            if page["next_cursor"] is None:
+                return
+            try:
+                page = await run_blocking(vector_db.list_documents, page["next_cursor"], MAX_LISTING_PAGE, properties)
+            except Exception as e:
+                # Too late for an error status; a truncated export is logged instead
+                logging.error(f"Document export stopped early: {str(e)}")
+                return
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 @app.delete("/documents")
 async def clear_documents():
     """
     Clear all stored documents from the vector database
     """
     try:
-        vector_db.clear_documents()
+        rag_system = await components.aget("rag_system")
+        await run_blocking(rag_system.vector_db.clear_documents)
+        rag_system.answer_cache.clear()
+        crawler = await components.aget("crawler")
+        await run_blocking(crawler.fetch_cache.clear)
         return {"message": "All documents cleared successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/documents/delete")
+async def delete_documents(request: DeleteDocumentsRequest):
+    """
+    Delete stored documents by page URL, domain, age or search query, in
+    rate-limited batches
+    """
+    older_than = None
+    if request.older_than_days is not None:
+        older_than = time.time() - request.older_than_days * 86400
+    try:
+        report = await _delete_documents(
+            urls=request.urls, domains=request.domains, older_than=older_than,
+            query=request.query, query_limit=request.query_limit or 10
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"deleted": report["deleted"], "batches": report["batches"], "urls": report["urls"]}
+
 @app.get("/")
 async def root():
     """
@@ -104,8 +700,18 @@ async def root():
         "version": "1.0",
         "endpoints": {
             "/search": "POST - Search and get answers (checks database first)",
-            "/documents": "GET - View stored documents",
+            "/search/stream": "POST - Same as /search, streamed as Server-Sent Events",
+            "/search/batch": "POST - Answer many queries at once, streamed as NDJSON",
+            "/jobs": "GET - Recent background crawl jobs",
+            "/stats": "GET - Request coalescing and token cache counters",
+            "/metrics": "GET - Prometheus metrics",
+            "/health/live": "GET - Liveness probe",
+            "/health/ready": "GET - Readiness probe with dependency health",
+            "/jobs/{job_id}": "GET - Status of a background crawl job",
+            "/documents": "GET - Page through stored documents (cursor, limit, fields)",
+            "/documents/export": "GET - Stream all stored documents as NDJSON",
             "/documents": "DELETE - Clear stored documents",
+            "/documents/delete": "POST - Delete documents by URL, domain, age or query",
             "/": "GET - This welcome page"
         }
     }
\ No newline at end of file
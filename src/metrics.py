@@ -0,0 +1,177 @@
+"""
+Lightweight metrics and per-request tracing.
+
+Counters and histograms are kept in process and rendered in the Prometheus
+text exposition format by the /metrics endpoint. timer(stage) records how
+long a pipeline stage took, both into the rag_stage_seconds histogram and
+into the trace of the request currently running, if any:
+
+    with metrics.trace() as request_trace:
+        with metrics.timer("vector_search"):
+            ...
+    request_trace.as_dict()  # {"vector_search": 0.012}
+
+Traces live in a context variable, so they follow the request into tasks
+and into run_blocking worker threads.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _format_labels(labelnames: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class Counter:
+    """Monotonically increasing count, optionally split by labels"""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+class Histogram:
+    """Observation counts in cumulative buckets, plus their sum and count"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._values.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = {key: list(series) for key, series in self._values.items()}
+        for key, series in sorted(values.items()):
+            for bound, count in zip(self.buckets, series):
+                labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                yield f"{self.name}_bucket{labels} {_format_value(count)}"
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            yield f"{self.name}_bucket{labels} {_format_value(series[-2])}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-1]!r}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {_format_value(series[-2])}"
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "rag_stage_seconds", "Time spent in each pipeline stage", ("stage",)
+))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "rag_http_request_seconds", "HTTP request latency until the response starts", ("endpoint", "method", "status")
+))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "rag_cache_lookups_total", "Cache lookups by cache layer and result (hit or miss)", ("cache", "result")
+))
+FETCHES = REGISTRY.register(Counter(
+    "rag_crawler_fetches_total", "Page fetches by outcome", ("outcome",)
+))
+BYTES_FETCHED = REGISTRY.register(Counter(
+    "rag_crawler_bytes_fetched_total", "Response body bytes downloaded by the crawler"
+))
+LLM_TOKENS = REGISTRY.register(Counter(
+    "rag_llm_tokens_total", "Tokens sent to and received from the LLM", ("kind",)
+))
+
+class Trace:
+    """Per-request stage timings; repeated stages (e.g. one fetch per page) add up"""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def as_dict(self) -> Dict[str, float]:
+        with self._lock:
+            timings = {stage: round(seconds, 4) for stage, seconds in self.stages.items()}
+        timings["total"] = round(time.perf_counter() - self.started, 4)
+        return timings
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("rag_trace", default=None)
+
+@contextmanager
+def trace() -> Iterator[Trace]:
+    request_trace = Trace()
+    token = _current_trace.set(request_trace)
+    try:
+        yield request_trace
+    finally:
+        _current_trace.reset(token)
+
+@contextmanager
+def timer(stage: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        request_trace = _current_trace.get()
+        if request_trace is not None:
+            request_trace.add(stage, elapsed)
+
+def record_cache_lookup(cache: str, hit: bool):
+    CACHE_LOOKUPS.inc(cache=cache, result="hit" if hit else "miss")
@@ -1,55 +1,291 @@
-from typing import Dict, List, Optional
-from openai import OpenAI
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+import asyncio
 import logging
+import threading
 import tiktoken
 import os
 
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+from . import metrics
+from .clients import get_async_openai_client, get_openai_client
+from .concurrency import run_blocking
+from .answer_cache import AnswerCache
+from .token_cache import TokenCache
+from .utils import hamming_distance, simhash
+
+# Cosine distance under which a stored document counts as relevant to a query.
+# Unless RAG_MAX_DISTANCE is set, the vector database supplies the threshold
+# that suits its embedding model.
+DEFAULT_MAX_DISTANCE = 0.25
+MAX_DISTANCE_OVERRIDE = os.getenv("RAG_MAX_DISTANCE")
+
+# Framing tokens the chat format adds around every message
+MESSAGE_OVERHEAD_TOKENS = 4
+# "\n\n" between passages, plus one token of slack for merges across the join
+PASSAGE_SEPARATOR_TOKENS = 2
+# A passage cut shorter than this is not worth including
+MIN_PASSAGE_TOKENS = 50
+# Passages whose SimHash fingerprints differ in at most this many bits repeat each other
+REDUNDANT_PASSAGE_BITS = int(os.getenv("REDUNDANT_PASSAGE_BITS", "3"))
+# Passages without a fingerprint from ingest are fingerprinted on this many leading characters
+FINGERPRINT_CHARS = 4000
+# Such fingerprints kept per object id
+FINGERPRINT_CACHE_SIZE = 10000
+# Passages retrieved when the caller does not pass documents in
+DEFAULT_CONTEXT_DOCS = 10
+# Completions a batch keeps in flight at once
+BATCH_CONCURRENCY = int(os.getenv("RAG_BATCH_CONCURRENCY", "8"))
+
+class RetrievalResult:
+    """Outcome of a single vector lookup, shared by the hit/miss check and answer generation"""
+
+    def __init__(self, query: str, documents: List[Dict], max_distance: float = DEFAULT_MAX_DISTANCE,
+                 embedding: Optional[List[float]] = None) -> None:
+        self.query = query
+        self.documents = documents
+        self.max_distance = max_distance
+        self.embedding = embedding
+
+    @property
+    def relevant_documents(self) -> List[Dict]:
+        return [
+            doc for doc in self.documents
+            if doc.get("distance") is None or doc["distance"] <= self.max_distance
+        ]
+
+    @property
+    def is_hit(self) -> bool:
+        return len(self.relevant_documents) > 0
 
 class RAGSystem:
-    def __init__(self, vector_db) -> None:
+    def __init__(self, vector_db, answer_cache: Optional[AnswerCache] = None, tokenizer=None,
+                 llm_client=None, async_llm_client=None) -> None:
         self.vector_db = vector_db
-        self.tokenizer = tiktoken.encoding_for_model("gpt-3.5-turbo")
+        # Chat completion clients; the shared OpenAI clients unless others are injected
+        self._llm_client = llm_client
+        self._async_llm_client = async_llm_client
+        if answer_cache is None:
+            answer_cache = AnswerCache(
+                max_entries=int(os.getenv("ANSWER_CACHE_SIZE", "1000")),
+                ttl_seconds=float(os.getenv("ANSWER_CACHE_TTL", "3600")),
+                similarity_threshold=float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))
+            )
+        self.answer_cache = answer_cache
+        self.tokenizer = tokenizer or tiktoken.encoding_for_model("gpt-3.5-turbo")
+        # Token counts and boundaries of recurring text (retrieved chunks, titles, the system prompt)
+        self.token_cache = TokenCache(self.tokenizer, max_tokens=int(os.getenv("TOKEN_CACHE_TOKENS", "5000000")))
+        # Fingerprints of stored objects that predate the ones computed at ingest
+        self._fingerprints: "OrderedDict[str, int]" = OrderedDict()
+        self._fingerprints_lock = threading.Lock()
         self.max_tokens = 8192  # Updated from 4096 to match GPT-3.5's actual limit
         self.max_response_tokens = 1000
-        # Reduce context tokens to stay within limits
-        self.max_context_tokens = 6000  # Leaving room for system message and response
+        # Upper bound on source tokens; context_budget also subtracts the prompt and response
+        self.max_context_tokens = 6000
+        if MAX_DISTANCE_OVERRIDE:
+            self.max_distance = float(MAX_DISTANCE_OVERRIDE)
+        else:
+            self.max_distance = getattr(vector_db, "default_max_distance", DEFAULT_MAX_DISTANCE)
+
+    @property
+    def llm_client(self):
+        return self._llm_client or get_openai_client()
+
+    @property
+    def async_llm_client(self):
+        return self._async_llm_client or get_async_openai_client()
 
-    def truncate_content(self, content: str, max_tokens: int) -> str:
-        tokens = self.tokenizer.encode(content)
-        if len(tokens) <= max_tokens:
+    def truncate_content(self, content: str, max_tokens: int, token_count: Optional[int] = None) -> str:
+        # Chunks carry their token count from ingest, so most need no tokenizing at all
+        if token_count is not None and token_count <= max_tokens:
+            return content
+        # Recurring text is tokenized once and then cut with a slice
+        truncated = self.token_cache.truncate(content, max_tokens)
+        if truncated is not None:
+            return truncated
+
+        # A token spans at least one character, and rarely more than a handful, so
+        # encoding a bounded prefix avoids tokenizing whole pages just to cut them
+        prefix = content[:max_tokens * 8]
+        tokens = self.tokenizer.encode(prefix)
+        if len(prefix) < len(content) and len(tokens) < max_tokens:
+            prefix = content
+            tokens = self.tokenizer.encode(content)
+        if len(prefix) == len(content) and len(tokens) <= max_tokens:
             return content
         return self.tokenizer.decode(tokens[:max_tokens])
 
-    def generate_response_with_sources(self, query: str, max_context_docs: int = 3) -> Dict[str, any]:
+    def retrieve(self, query: str, limit: int = 3, embedding: Optional[List[float]] = None) -> RetrievalResult:
+        if embedding is None:
+            embedding = self.vector_db.embed_query(query)
+        documents = self.vector_db.search(query, limit=limit, vector=embedding)
+        return RetrievalResult(query, documents, self.max_distance, embedding)
+
+    async def aretrieve(self, query: str, limit: int = 3, embedding: Optional[List[float]] = None) -> RetrievalResult:
+        if embedding is None:
+            embedding = await run_blocking(self.vector_db.embed_query, query)
+        documents = await run_blocking(self.vector_db.search, query, limit=limit, vector=embedding)
+        return RetrievalResult(query, documents, self.max_distance, embedding)
+
+    async def aretrieve_many(self, queries: List[str], limit: int = 3,
+                             embeddings: Optional[List[Optional[List[float]]]] = None) -> List[RetrievalResult]:
+        """Retrieve for a batch of queries with one embedding call and one batched vector lookup"""
+        if embeddings is None:
+            embeddings = await run_blocking(self.vector_db.embed_queries, queries)
+        results = await run_blocking(self.vector_db.search_many, queries, limit=limit, vectors=embeddings)
+        return [
+            RetrievalResult(query, documents, self.max_distance, embedding)
+            for query, documents, embedding in zip(queries, results, embeddings)
+        ]
+
+    async def agenerate_batch(self, requests: List[Tuple[str, List[Dict]]],
+                              max_concurrency: int = BATCH_CONCURRENCY) -> AsyncIterator[Tuple[int, Dict]]:
+        """
+        Answer (query, documents) pairs with at most max_concurrency completions
+        in flight, yielding (position in requests, response) as each finishes
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def answer(position: int, query: str, documents: List[Dict]) -> Tuple[int, Dict]:
+            async with semaphore:
+                return position, await self.agenerate_response_with_sources(query, documents=documents)
+
+        tasks = [asyncio.ensure_future(answer(i, query, documents)) for i, (query, documents) in enumerate(requests)]
         try:
-            relevant_docs = self.vector_db.search(query, limit=max_context_docs)
-            contexts_with_sources = []
-            sources = []
-            
-            # Calculate tokens per document - reduce to stay within limits
-            max_tokens_per_doc = self.max_context_tokens // (max_context_docs + 1)  # Add buffer
-
-            for doc in relevant_docs:
-                title = doc.get("title", "Untitled")
-                content = doc.get("content", "")
-                url = doc.get("url", "")
-                
-                # Truncate content if needed
-                truncated_content = self.truncate_content(content, max_tokens_per_doc)
-                
-                contexts_with_sources.append(f"Source: {title}\nContent: {truncated_content}")
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            # A consumer that stops early must not leave completions running
+            for task in tasks:
+                task.cancel()
+
+    def cached_answer(self, query: str, embedding: Optional[List[float]] = None) -> Optional[Dict]:
+        """
+        Look the query up in the answer cache, by normalized text first and by
+        embedding similarity when an embedding is given
+        """
+        cached = self.answer_cache.get(query)
+        if cached is None and embedding is not None:
+            cached = self.answer_cache.get_similar(embedding)
+        return cached
+
+    def remember_answer(self, query: str, response: Dict, embedding: Optional[List[float]] = None):
+        # Failed generations come back without sources and must not be cached
+        if response.get("sources"):
+            self.answer_cache.put(query, response, embedding)
+
+    def invalidate_sources(self, urls: List[str]) -> int:
+        """Forget cached answers built from pages that were just re-ingested or deleted"""
+        return self.answer_cache.invalidate_urls(urls)
+
+    def _count_tokens(self, text: str) -> int:
+        return self.token_cache.count(text)
+
+    def _prompt_overhead(self, query: str) -> int:
+        """Exact token cost of the chat request without any context"""
+        messages = self._create_messages(self._create_prompt(query, ""))
+        # Every chat message costs a few framing tokens, and the reply is primed with 3 more
+        return sum(MESSAGE_OVERHEAD_TOKENS + self._count_tokens(m["content"]) for m in messages) + 3
+
+    def context_budget(self, query: str) -> int:
+        """Tokens left for sources once the prompt, system message and response are accounted for"""
+        window = self.max_tokens - self.max_response_tokens - self._prompt_overhead(query)
+        return max(0, min(self.max_context_tokens, window))
+
+    def _fingerprint(self, doc: Dict) -> int:
+        # Chunks carry the SimHash computed at ingest. Older objects and freshly
+        # crawled pages are fingerprinted on their opening text, once per object id
+        stored = doc.get("simhash")
+        if stored:
+            return int(stored, 16)
+        doc_id = doc.get("id")
+        if doc_id is None:
+            return simhash(doc["content"][:FINGERPRINT_CHARS])
+        with self._fingerprints_lock:
+            fingerprint = self._fingerprints.get(doc_id)
+            if fingerprint is not None:
+                self._fingerprints.move_to_end(doc_id)
+                return fingerprint
+        fingerprint = simhash(doc["content"][:FINGERPRINT_CHARS])
+        with self._fingerprints_lock:
+            self._fingerprints[doc_id] = fingerprint
+            if len(self._fingerprints) > FINGERPRINT_CACHE_SIZE:
+                self._fingerprints.popitem(last=False)
+        return fingerprint
+
+    def _is_redundant(self, fingerprint: int, packed: List[int]) -> bool:
+        return any(hamming_distance(fingerprint, seen) <= REDUNDANT_PASSAGE_BITS for seen in packed)
+
+    def _build_context(self, relevant_docs: List[Dict], query: str, max_context_docs: Optional[int] = None):
+        with metrics.timer("pack_context"):
+            context, sources, tokens = self._pack_context(relevant_docs, query, max_context_docs)
+        metrics.LLM_TOKENS.inc(tokens, kind="context")
+        return context, sources
+
+    def _pack_context(self, relevant_docs: List[Dict], query: str, max_context_docs: Optional[int]):
+        """
+        Greedily pack ranked passages into the context budget.
+        Uses the token counts and fingerprints stored at ingest time, skips
+        passages that repeat one already packed, and truncates only the passage
+        that fills the budget.
+        """
+        contexts_with_sources = []
+        sources = []
+        packed_fingerprints = []
+        seen_ids = set()
+        budget = remaining = self.context_budget(query)
+
+        for doc in relevant_docs:
+            if max_context_docs is not None and len(contexts_with_sources) >= max_context_docs:
+                break
+            title = doc.get("title", "Untitled")
+            content = doc.get("content", "")
+            url = doc.get("url", "")
+            doc_id = doc.get("id")
+            if not content or (doc_id is not None and doc_id in seen_ids):
+                continue
+            header = f"Source: {title}\nContent: "
+            cost = self._count_tokens(header) + PASSAGE_SEPARATOR_TOKENS
+            content_tokens = doc.get("token_count") or self._count_tokens(content)
+            if cost + content_tokens > remaining:
+                if remaining - cost < MIN_PASSAGE_TOKENS:
+                    continue
+                content = self.truncate_content(content, remaining - cost, content_tokens)
+                content_tokens = remaining - cost
+            # Only passages that fit are checked against the ones already packed
+            fingerprint = self._fingerprint(doc)
+            if self._is_redundant(fingerprint, packed_fingerprints):
+                continue
+
+            contexts_with_sources.append(header + content)
+            remaining -= cost + content_tokens
+            packed_fingerprints.append(fingerprint)
+            if doc_id is not None:
+                seen_ids.add(doc_id)
+            # Several chunks of one page cite it only once
+            if url not in {source["url"] for source in sources}:
                 sources.append({"title": title, "url": url})
-            
-            context = "\n\n".join(contexts_with_sources)
+
+        return "\n\n".join(contexts_with_sources), sources, budget - remaining
+
+    def generate_response_with_sources(self, query: str, max_context_docs: Optional[int] = None, documents: Optional[List[Dict]] = None) -> Dict[str, any]:
+        """
+        Answer the query from the given pre-retrieved documents, or from a
+        fresh vector search when none are passed in.
+        """
+        try:
+            if documents is None:
+                documents = self.retrieve(query, limit=max_context_docs or DEFAULT_CONTEXT_DOCS).relevant_documents
+            context, sources = self._build_context(documents, query, max_context_docs)
             prompt = self._create_prompt(query, context)
 
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=self._create_messages(prompt),
-                temperature=0.5,
-                max_tokens=self.max_response_tokens
-            )
+            with metrics.timer("completion"):
+                response = self.llm_client.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=self._create_messages(prompt),
+                    temperature=0.5,
+                    max_tokens=self.max_response_tokens
+                )
+            self._record_usage(response)
             
             return {
                 "answer": response.choices[0].message.content,
@@ -62,6 +298,106 @@ class RAGSystem:
                 "sources": []
             }
 
+    async def agenerate_response_with_sources(self, query: str, max_context_docs: Optional[int] = None, documents: Optional[List[Dict]] = None) -> Dict[str, any]:
+        """Non-blocking variant of generate_response_with_sources for the API"""
+        try:
+            if documents is None:
+                documents = (await self.aretrieve(query, limit=max_context_docs or DEFAULT_CONTEXT_DOCS)).relevant_documents
+            # Tokenizing long pages is CPU-bound, keep it off the event loop too
+            context, sources = await run_blocking(self._build_context, documents, query, max_context_docs)
+            prompt = self._create_prompt(query, context)
+
+            with metrics.timer("completion"):
+                response = await self.async_llm_client.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=self._create_messages(prompt),
+                    temperature=0.5,
+                    max_tokens=self.max_response_tokens
+                )
+            self._record_usage(response)
+
+            return {
+                "answer": response.choices[0].message.content,
+                "sources": sources
+            }
+        except Exception as e:
+            logging.error(f"Error generating response: {str(e)}")
+            return {
+                "answer": f"Error generating response: {str(e)}",
+                "sources": []
+            }
+
+    def stream_response_with_sources(self, query: str, max_context_docs: Optional[int] = None,
+                                     documents: Optional[List[Dict]] = None) -> Iterator[Tuple[str, any]]:
+        """
+        Streaming variant of generate_response_with_sources.
+        Yields ("sources", sources) first, then ("token", text) as the completion
+        arrives and finally ("done", {"answer", "sources"}). Failures yield
+        ("error", message) before the final event.
+        """
+        answer_parts = []
+        sources = []
+        try:
+            if documents is None:
+                documents = self.retrieve(query, limit=max_context_docs or DEFAULT_CONTEXT_DOCS).relevant_documents
+            context, sources = self._build_context(documents, query, max_context_docs)
+            yield "sources", sources
+
+            stream = self.llm_client.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=self._create_messages(self._create_prompt(query, context)),
+                temperature=0.5,
+                max_tokens=self.max_response_tokens,
+                stream=True
+            )
+            with metrics.timer("completion"):
+                for chunk in stream:
+                    token = chunk.choices[0].delta.content if chunk.choices else None
+                    if token:
+                        answer_parts.append(token)
+                        yield "token", token
+        except Exception as e:
+            logging.error(f"Error generating response: {str(e)}")
+            yield "error", f"Error generating response: {str(e)}"
+            sources = []
+        yield "done", {"answer": "".join(answer_parts), "sources": sources}
+
+    async def astream_response_with_sources(self, query: str, max_context_docs: Optional[int] = None,
+                                            documents: Optional[List[Dict]] = None) -> AsyncIterator[Tuple[str, any]]:
+        """Non-blocking variant of stream_response_with_sources for the API"""
+        answer_parts = []
+        sources = []
+        try:
+            if documents is None:
+                documents = (await self.aretrieve(query, limit=max_context_docs or DEFAULT_CONTEXT_DOCS)).relevant_documents
+            context, sources = await run_blocking(self._build_context, documents, query, max_context_docs)
+            yield "sources", sources
+
+            stream = await self.async_llm_client.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=self._create_messages(self._create_prompt(query, context)),
+                temperature=0.5,
+                max_tokens=self.max_response_tokens,
+                stream=True
+            )
+            with metrics.timer("completion"):
+                async for chunk in stream:
+                    token = chunk.choices[0].delta.content if chunk.choices else None
+                    if token:
+                        answer_parts.append(token)
+                        yield "token", token
+        except Exception as e:
+            logging.error(f"Error generating response: {str(e)}")
+            yield "error", f"Error generating response: {str(e)}"
+            sources = []
+        yield "done", {"answer": "".join(answer_parts), "sources": sources}
+
+    def _record_usage(self, response):
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            metrics.LLM_TOKENS.inc(usage.prompt_tokens or 0, kind="prompt")
+            metrics.LLM_TOKENS.inc(usage.completion_tokens or 0, kind="completion")
+
     def _create_prompt(self, query: str, context: str) -> str:
         return f"""Based on the following sources, provide a comprehensive analysis of current trends and developments.
         
@@ -0,0 +1,97 @@
+"""
+Hybrid retrieval: fusing vector and keyword (BM25) result lists, plus a cheap
+lexical rerank over the fused top-k.
+
+Every fused hit keeps its cosine "distance" (None when unknown) and
+"bm25_score" (None when it did not match the keyword query) and gains a
+"score" from the fusion step; higher scores rank first.
+"""
+from typing import Dict, List, Optional
+
+from .keyword_index import tokenize
+
+FUSION_METHODS = ("rrf", "relative_score")
+RERANKERS = ("none", "overlap")
+
+def _hit_key(hit: Dict) -> str:
+    return hit.get("id") or f"{hit.get('url')}#{hit.get('chunk_index')}"
+
+def _merge(vector_hits: List[Dict], keyword_hits: List[Dict]) -> Dict[str, Dict]:
+    merged: Dict[str, Dict] = {}
+    for hit in vector_hits:
+        merged[_hit_key(hit)] = {**hit, "bm25_score": None}
+    for hit in keyword_hits:
+        key = _hit_key(hit)
+        if key in merged:
+            merged[key]["bm25_score"] = hit.get("bm25_score")
+        else:
+            merged[key] = {"distance": None, **hit}
+    return merged
+
+def reciprocal_rank_fusion(vector_hits: List[Dict], keyword_hits: List[Dict],
+                           alpha: float = 0.5, k: int = 60) -> List[Dict]:
+    """Score each hit by alpha/(k + vector rank) + (1 - alpha)/(k + keyword rank)"""
+    merged = _merge(vector_hits, keyword_hits)
+    scores = {key: 0.0 for key in merged}
+    for rank, hit in enumerate(vector_hits):
+        scores[_hit_key(hit)] += alpha / (k + rank + 1)
+    for rank, hit in enumerate(keyword_hits):
+        scores[_hit_key(hit)] += (1 - alpha) / (k + rank + 1)
+    return _ranked(merged, scores)
+
+def _min_max(values: Dict[str, float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    low, high = min(values.values()), max(values.values())
+    if high == low:
+        return {key: 1.0 for key in values}
+    return {key: (value - low) / (high - low) for key, value in values.items()}
+
+def relative_score_fusion(vector_hits: List[Dict], keyword_hits: List[Dict], alpha: float = 0.5) -> List[Dict]:
+    """Min-max normalize vector similarity and BM25 score per list, then blend them by alpha"""
+    merged = _merge(vector_hits, keyword_hits)
+    similarity = _min_max({
+        _hit_key(hit): 1.0 - hit["distance"] for hit in vector_hits if hit.get("distance") is not None
+    })
+    keyword = _min_max({_hit_key(hit): hit.get("bm25_score") or 0.0 for hit in keyword_hits})
+    scores = {
+        key: alpha * similarity.get(key, 0.0) + (1 - alpha) * keyword.get(key, 0.0)
+        for key in merged
+    }
+    return _ranked(merged, scores)
+
+def _ranked(merged: Dict[str, Dict], scores: Dict[str, float]) -> List[Dict]:
+    order = sorted(merged, key=lambda key: scores[key], reverse=True)
+    return [{**merged[key], "score": scores[key]} for key in order]
+
+def fuse(vector_hits: List[Dict], keyword_hits: List[Dict], method: str = "rrf", alpha: float = 0.5) -> List[Dict]:
+    if method == "rrf":
+        return reciprocal_rank_fusion(vector_hits, keyword_hits, alpha)
+    if method == "relative_score":
+        return relative_score_fusion(vector_hits, keyword_hits, alpha)
+    raise ValueError(f"Unknown fusion method: {method}")
+
+def overlap_rerank(query: str, hits: List[Dict], weight: float = 0.5) -> List[Dict]:
+    """
+    Reorder hits by their fused score blended with query-term coverage: the
+    share of distinct query terms found in the hit's title or content.
+    Costs one tokenization per hit, so it is only meant for the top-k.
+    """
+    terms = set(tokenize(query))
+    if not terms or not hits:
+        return hits
+    top_score = max(hit.get("score") or 0.0 for hit in hits) or 1.0
+    reranked = []
+    for hit in hits:
+        present = set(tokenize(f"{hit.get('title', '')} {hit.get('content', '')}"))
+        coverage = len(terms & present) / len(terms)
+        score = (1 - weight) * (hit.get("score") or 0.0) / top_score + weight * coverage
+        reranked.append({**hit, "score": score})
+    return sorted(reranked, key=lambda hit: hit["score"], reverse=True)
+
+def rerank(query: str, hits: List[Dict], method: Optional[str] = "none") -> List[Dict]:
+    if not method or method == "none":
+        return hits
+    if method == "overlap":
+        return overlap_rerank(query, hits)
+    raise ValueError(f"Unknown reranker: {method}")
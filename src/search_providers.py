@@ -0,0 +1,239 @@
+"""
+Web search providers for the crawler.
+
+A provider turns a query into candidate page URLs. The base providers (live
+Google results, or a local JSON fixture file for offline runs) can be
+wrapped with a token-bucket rate limiter and a persistent query -> URLs
+cache, so the same search is not repeated on every cache miss:
+
+    provider = CachedSearchProvider(RateLimitedProvider(GoogleSearchProvider()), SearchCache())
+    provider("rag pipelines", num_results=10)
+
+create_search_provider() builds that stack from the environment.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from . import metrics
+from .utils import normalize_query
+
+class SearchRateLimited(Exception):
+    """Raised when a search would wait longer than the limiter allows"""
+
+class SearchProvider:
+    """Callable as provider(query, num_results=...) like googlesearch.search"""
+
+    def search(self, query: str, num_results: int = 10) -> List[str]:
+        raise NotImplementedError
+
+    def __call__(self, query: str, num_results: int = 10) -> List[str]:
+        return self.search(query, num_results)
+
+class GoogleSearchProvider(SearchProvider):
+    """Scrapes Google result pages through the googlesearch package"""
+
+    def search(self, query: str, num_results: int = 10) -> List[str]:
+        from googlesearch import search
+
+        return list(dict.fromkeys(search(query, num_results=num_results)))[:num_results]
+
+class FixtureSearchProvider(SearchProvider):
+    """
+    Offline provider reading results from a JSON file mapping queries to URL
+    lists. Queries are matched in normalized form; the optional "*" entry
+    answers every query that has no entry of its own.
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, encoding="utf-8") as f:
+            results = json.load(f)
+        self.results = {key if key == "*" else normalize_query(key): urls for key, urls in results.items()}
+
+    def search(self, query: str, num_results: int = 10) -> List[str]:
+        urls = self.results.get(normalize_query(query), self.results.get("*", []))
+        return list(urls[:num_results])
+
+class TokenBucket:
+    """Allows rate acquisitions per second on average, in bursts of up to capacity"""
+
+    def __init__(self, rate: float, capacity: float = 1.0) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token, possibly going into debt, and return how long until it is backed"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def _refund(self):
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + 1)
+
+    def acquire(self, max_wait: Optional[float] = None) -> float:
+        """Block until a token is available and return the seconds waited"""
+        wait = self._reserve()
+        if max_wait is not None and wait > max_wait:
+            self._refund()
+            raise SearchRateLimited(f"search rate limit needs a {wait:.1f}s wait")
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+class RateLimitedProvider(SearchProvider):
+    """Spaces out searches on the wrapped provider with a token bucket shared by all threads"""
+
+    def __init__(self, provider: SearchProvider, bucket: Optional[TokenBucket] = None,
+                 max_wait: Optional[float] = 30.0) -> None:
+        self.provider = provider
+        self.bucket = bucket or TokenBucket(rate=0.2, capacity=3)
+        self.max_wait = max_wait
+
+    def search(self, query: str, num_results: int = 10) -> List[str]:
+        with metrics.timer("search_rate_wait"):
+            self.bucket.acquire(self.max_wait)
+        return self.provider.search(query, num_results)
+
+class SearchCache:
+    """
+    Persistent query -> result URLs cache backed by SQLite.
+    Entries record whether the provider ran out of results (exhausted), expire
+    after ttl_seconds, and the least recently used are pruned beyond max_entries.
+    """
+
+    def __init__(self, path: str = "data/search_cache.sqlite3", ttl_seconds: float = 24 * 3600,
+                 max_entries: int = 10000) -> None:
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS searches (
+                    query TEXT PRIMARY KEY,
+                    urls TEXT,
+                    exhausted INTEGER,
+                    searched_at REAL,
+                    accessed_at REAL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS searches_accessed_at ON searches (accessed_at)")
+
+    def get(self, query: str) -> Optional[Dict]:
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT urls, exhausted, searched_at FROM searches WHERE query = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[2] >= self.ttl_seconds:
+                self._conn.execute("DELETE FROM searches WHERE query = ?", (key,))
+                return None
+            self._conn.execute("UPDATE searches SET accessed_at = ? WHERE query = ?", (now, key))
+        return {"urls": json.loads(row[0]), "exhausted": bool(row[1])}
+
+    def put(self, query: str, urls: List[str], exhausted: bool = False):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO searches (query, urls, exhausted, searched_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (normalize_query(query), json.dumps(urls), int(exhausted), now, now)
+            )
+            self._writes_since_prune += 1
+            if self._writes_since_prune >= 100:
+                self._prune()
+
+    def _prune(self):
+        self._writes_since_prune = 0
+        self._conn.execute("DELETE FROM searches WHERE searched_at < ?", (time.time() - self.ttl_seconds,))
+        self._conn.execute(
+            """
+            DELETE FROM searches WHERE query IN (
+                SELECT query FROM searches ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_entries,)
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM searches").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class CachedSearchProvider(SearchProvider):
+    """
+    Serves repeat searches from a SearchCache. A cached list shorter than the
+    request counts as a miss, unless the provider returned everything it had.
+    """
+
+    def __init__(self, provider: SearchProvider, cache: SearchCache) -> None:
+        self.provider = provider
+        self.cache = cache
+
+    def search(self, query: str, num_results: int = 10) -> List[str]:
+        cached = self.cache.get(query)
+        hit = cached is not None and (len(cached["urls"]) >= num_results or cached["exhausted"])
+        metrics.record_cache_lookup("search", hit)
+        if hit:
+            return cached["urls"][:num_results]
+
+        urls = self.provider.search(query, num_results)
+        self.cache.put(query, urls, exhausted=len(urls) < num_results)
+        return urls
+
+def create_search_provider() -> SearchProvider:
+    """
+    Build the provider selected by SEARCH_PROVIDER (google or fixture, the
+    latter reading SEARCH_FIXTURE_PATH), rate limited to SEARCH_RATE searches
+    per second in bursts of SEARCH_BURST and cached for SEARCH_CACHE_TTL seconds
+    """
+    name = os.getenv("SEARCH_PROVIDER", "google").lower()
+    if name == "google":
+        provider = RateLimitedProvider(
+            GoogleSearchProvider(),
+            TokenBucket(rate=float(os.getenv("SEARCH_RATE", "0.2")), capacity=float(os.getenv("SEARCH_BURST", "3"))),
+            max_wait=float(os.getenv("SEARCH_MAX_WAIT", "30"))
+        )
+    elif name == "fixture":
+        # Local file lookups need neither rate limiting nor caching
+        path = os.getenv("SEARCH_FIXTURE_PATH")
+        if not path:
+            raise ValueError("SEARCH_FIXTURE_PATH must point to a results file for the fixture provider")
+        return FixtureSearchProvider(path)
+    else:
+        raise ValueError(f"Unknown search provider: {name}")
+
+    ttl = float(os.getenv("SEARCH_CACHE_TTL", str(24 * 3600)))
+    if ttl <= 0:
+        return provider
+    cache = SearchCache(path=os.getenv("SEARCH_CACHE_PATH", "data/search_cache.sqlite3"), ttl_seconds=ttl)
+    logging.info(f"Caching web search results for {ttl:.0f}s")
+    return CachedSearchProvider(provider, cache)
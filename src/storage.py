@@ -0,0 +1,78 @@
+from typing import Dict, List, Optional, Sequence
+
+class StorageBackend:
+    """
+    Storage interface behind VectorDatabase.
+    Backends store chunk objects (plain property dicts) together with their
+    embedding and answer vector searches over them.
+    """
+
+    # Cosine distance under which a hit counts as relevant to its query; tuned
+    # for OpenAI embeddings, backends with other models override it
+    default_max_distance = 0.25
+
+    def setup(self):
+        """Prepare the backend (schema, files, ...) for use"""
+
+    def is_ready(self) -> bool:
+        return True
+
+    def embed_query(self, query: str) -> Optional[List[float]]:
+        """Embed a query with the same model used for the stored objects"""
+        raise NotImplementedError
+
+    def embed_queries(self, queries: List[str]) -> List[Optional[List[float]]]:
+        """Embed several queries, in one model call where the backend can"""
+        return [self.embed_query(query) for query in queries]
+
+    def add_objects(self, objects: List[Dict]) -> List[Dict]:
+        """
+        Store objects, embedding them as needed, and return the ones that could
+        not be stored. An object whose "id" already exists replaces the stored one.
+        """
+        raise NotImplementedError
+
+    def get_page_index(self, urls: List[str], content_hashes: List[str],
+                       simhash_bands: Sequence[str] = ()) -> List[Dict]:
+        """
+        Return the distinct {"parent_url", "content_hash", "page_simhash"}
+        entries stored for any of the given page URLs, page content hashes or
+        page SimHash bands
+        """
+        raise NotImplementedError
+
+    def delete_pages(self, urls: List[str]) -> int:
+        """Delete every chunk whose parent_url is one of the given URLs and return how many went"""
+        raise NotImplementedError
+
+    def delete_objects(self, ids: List[str]) -> int:
+        """Delete the objects with the given ids and return how many were deleted"""
+        raise NotImplementedError
+
+    def search(self, query: str, limit: int = 5, vector: Optional[List[float]] = None) -> List[Dict]:
+        """Return the nearest objects, each with "id" and cosine "distance" set"""
+        raise NotImplementedError
+
+    def search_many(self, queries: List[str], limit: int = 5,
+                    vectors: Optional[List[Optional[List[float]]]] = None) -> List[List[Dict]]:
+        """search() for several queries at once; one result list per query, in order"""
+        vectors = vectors or [None] * len(queries)
+        return [self.search(query, limit, vector) for query, vector in zip(queries, vectors)]
+
+    def keyword_search(self, query: str, limit: int = 5, vector: Optional[List[float]] = None) -> List[Dict]:
+        """
+        Return the best BM25 matches, each with "id" and "bm25_score" set.
+        When a query vector is given, "distance" is filled in as well.
+        """
+        raise NotImplementedError
+
+    def list_objects(self, properties: List[str], after: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """
+        Return up to limit objects ordered by id, starting after the given id.
+        Each carries "id", "ingested_at" (Unix seconds, None when unknown) and
+        the requested properties.
+        """
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
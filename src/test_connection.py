@@ -1,4 +1,4 @@
-from database import VectorDatabase
+from src.database import VectorDatabase
 import logging
 
 logging.basicConfig(level=logging.INFO)
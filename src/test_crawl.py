@@ -1,7 +1,7 @@
 import os
 from dotenv import load_dotenv
-from crawler import WebCrawler
-from database import VectorDatabase
+from src.crawler import WebCrawler
+from src.database import VectorDatabase
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -10,7 +10,7 @@ load_dotenv()
 def test_crawl_and_store():
     try:
         # Initialize crawler and database
-        crawler = WebCrawler(os.getenv("CRAWL_WEBSITE"))
+        crawler = WebCrawler()
         db = VectorDatabase()
 
         # Check database connection
@@ -20,7 +20,8 @@ def test_crawl_and_store():
 
         # Crawl website
         print(f"🕷️ Crawling {os.getenv('CRAWL_WEBSITE')}...")
-        documents = crawler.crawl(max_pages=5)  # Limit to 5 pages for testing
+        document = crawler.get_page_content(os.getenv("CRAWL_WEBSITE"))
+        documents = [document] if document else []
         print(f"✅ Crawled {len(documents)} pages")
 
         # Store in database
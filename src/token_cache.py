@@ -0,0 +1,99 @@
+"""
+LRU cache of tokenizations for text that recurs across requests.
+
+Retrieved chunks are the same stored objects query after query, so their
+token counts and token boundaries are computed once, keyed by a hash of the
+exact text, and reused. With a tiktoken encoding the cache keeps the
+character offset where each token starts, which makes truncating to the
+first n tokens a plain string slice; other tokenizers keep their token ids
+and truncate with a single decode. The cache is bounded by the total number
+of tokens it describes, about 4 bytes each.
+"""
+import hashlib
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+class TokenCache:
+    def __init__(self, tokenizer, max_tokens: int = 5_000_000) -> None:
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.hits = 0
+        self.misses = 0
+        self._offsets = hasattr(tokenizer, "decode_with_offsets")
+        # text hash -> (token count, token start offsets or token ids)
+        self._entries: "OrderedDict[bytes, Tuple[int, array]]" = OrderedDict()
+        self._held_tokens = 0
+        self._lock = threading.Lock()
+
+    def _key(self, text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+    def _entry(self, text: str) -> Tuple[int, array]:
+        key = self._key(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        tokens = self.tokenizer.encode(text)
+        if self._offsets:
+            _, offsets = self.tokenizer.decode_with_offsets(tokens)
+            entry = (len(tokens), array("I", offsets))
+        else:
+            entry = (len(tokens), array("I", tokens))
+        with self._lock:
+            self.misses += 1
+            if key not in self._entries:
+                self._entries[key] = entry
+                self._held_tokens += len(entry[1])
+            while self._held_tokens > self.max_tokens:
+                _, evicted = self._entries.popitem(last=False)
+                self._held_tokens -= len(evicted[1])
+        return entry
+
+    def _cacheable(self, text: str) -> bool:
+        # A token covers at least one character, so this bounds the entry size
+        return len(text) <= self.max_tokens
+
+    def count(self, text: str) -> int:
+        if not self._cacheable(text):
+            return len(self.tokenizer.encode(text))
+        return self._entry(text)[0]
+
+    def truncate(self, text: str, max_tokens: int) -> Optional[str]:
+        """
+        The longest prefix of text within max_tokens tokens, or None when the
+        text is too long to cache and the caller should truncate it itself
+        """
+        if not self._cacheable(text):
+            return None
+        count, positions = self._entry(text)
+        if count <= max_tokens:
+            return text
+        if max_tokens <= 0:
+            return ""
+        if self._offsets:
+            # Cut where token max_tokens starts; a character split across the
+            # boundary is dropped, so the prefix never exceeds the budget
+            return text[:positions[max_tokens]]
+        return self.tokenizer.decode(positions[:max_tokens].tolist())
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "tokens": self._held_tokens,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._held_tokens = 0
@@ -0,0 +1,39 @@
+import hashlib
+import re
+from typing import List
+
+import numpy as np
+
+def normalize_query(query: str) -> str:
+    """Canonical form of a query used as a cache / dedup key"""
+    query = " ".join(query.lower().split())
+    return re.sub(r"[\s?!.]+$", "", query)
+
+def content_hash(text: str) -> str:
+    """Stable fingerprint of page text, insensitive to whitespace changes"""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """64-bit SimHash over word shingles; near-duplicate texts differ in few bits"""
+    words = text.lower().split()
+    shingles = [" ".join(words[i:i + shingle_size]) for i in range(max(1, len(words) - shingle_size + 1))]
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") for s in shingles],
+        dtype=np.uint64
+    )
+    bits = (hashes[:, None] >> np.arange(64, dtype=np.uint64)) & np.uint64(1)
+    weights = bits.sum(axis=0).astype(np.int64) * 2 - len(shingles)
+    return sum(1 << i for i in range(64) if weights[i] > 0)
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+def simhash_bands(fingerprint: int, bands: int = 4) -> List[str]:
+    """
+    Split a 64-bit SimHash into tagged bands ("0:1a2b", ...). Fingerprints
+    within bands - 1 bits of each other share at least one band exactly, so
+    an equality lookup on bands finds every near-duplicate candidate.
+    """
+    width = 64 // bands
+    mask = (1 << width) - 1
+    return [f"{i}:{(fingerprint >> (i * width)) & mask:0{width // 4}x}" for i in range(bands)]